@@ -252,54 +252,28 @@ async function sendToPython(finalData, chatId, originalMessage) {
 
         console.log('Sending data to Python...', JSON.stringify(pythonData, null, 2));
         
+        // Python queues the order and answers 202 right away; the result is
+        // posted back to /send-message when the placement finishes
         const response = await axios.post('http://localhost:5000/process-data', pythonData, {
             headers: { 'Content-Type': 'application/json' },
-            timeout: 300000  // 30 seconds timeout
+            timeout: 30000  // 30 seconds timeout
         });
 
         console.log('✅ Python response:', response.data);
 
-        // Handle successful response from Python
-        if (response.data && response.data.status === 'success') {
-            // Send success message as reply to the original ap kara message
-            if (globalSock && chatId) {
-                let successMessage = '✅ *Processing Completed Successfully!*\n\n';
-                successMessage += '📋 *Processed Data:*\n';
-                
-                const processedData = response.data.processed_data;
-                if (processedData) {
-                    if (processedData.driver_name) {
-                        successMessage += `👤 Driver Name: ${processedData.driver_name}\n`;
-                    }
-                    if (processedData.driver_license) {
-                        successMessage += `🆔 License: ${processedData.driver_license}\n`;
-                    }
-                    if (processedData.vehicle_num) {
-                        successMessage += `🚛 Vehicle: ${processedData.vehicle_num}\n`;
-                    }
-                    if (processedData.destination) {
-                        successMessage += `📍 Destination: ${processedData.destination}\n`;
-                    }
-                    if (processedData.weight) {
-                        successMessage += `⚖️ Weight: ${processedData.weight} MT\n`;
-                    }
-                    if (processedData.so_no) {
-                        successMessage += `📋 SO Number: ${processedData.so_no}\n`;
-                    }
-                    if (processedData.phone_num) {
-                        successMessage += `📞 Phone: ${processedData.phone_num}\n`;
-                    }
-                }
-                
-                successMessage += '\n🎉 All processes executed successfully!';
-
-                await globalSock.sendMessage(chatId, { 
-                    text: successMessage
-                }, { 
-                    quoted: originalMessage
-                });
-                
-                console.log('✅ Success message sent to WhatsApp');
+        if (response.data && response.data.job_id) {
+            // Remember which message to quote when the job result comes back
+            messageContexts.set(response.data.job_id, {
+                messageKey: originalMessage.key,
+                originalMessage: originalMessage,
+                timestamp: Date.now()
+            });
+            if (response.data.status === 'duplicate') {
+                // Same SO, vehicle and driver as an earlier message; Python
+                // answers with that job's result instead of placing it again
+                console.log(`♻️ Order already handled as job ${response.data.job_id}`);
+            } else {
+                console.log(`📥 Order queued as job ${response.data.job_id}`);
             }
         }
 
@@ -346,7 +320,7 @@ async function sendToPython(finalData, chatId, originalMessage) {
 // MODIFIED: Route to receive messages from Python with reply functionality
 app.post('/send-message', async (req, res) => {
     try {
-        const { chat_id, message, message_type = 'text', reply_to_original = false } = req.body;
+        const { chat_id, job_id, message, message_type = 'text', reply_to_original = false } = req.body;
         
         if (!chat_id || !message) {
             return res.status(400).json({ 
@@ -376,9 +350,14 @@ app.post('/send-message', async (req, res) => {
         }
 
         // Add reply context if requested and available
+        // Job results quote the exact message that queued the job
+        let sendOptions = {};
         if (reply_to_original) {
-            const messageContext = messageContexts.get(chat_id);
-            if (messageContext && messageContext.messageKey) {
+            const messageContext = (job_id && messageContexts.get(job_id)) || messageContexts.get(chat_id);
+            if (messageContext && messageContext.originalMessage?.key) {
+                sendOptions = { quoted: messageContext.originalMessage };
+                console.log(`📎 Adding reply context for ${chat_id}:`, messageContext.messageKey);
+            } else if (messageContext && messageContext.messageKey) {
                 messagePayload.quoted = messageContext.messageKey;
                 console.log(`📎 Adding reply context for ${chat_id}:`, messageContext.messageKey);
             } else {
@@ -386,7 +365,11 @@ app.post('/send-message', async (req, res) => {
             }
         }
 
-        await globalSock.sendMessage(chat_id, messagePayload);
+        await globalSock.sendMessage(chat_id, messagePayload, sendOptions);
+
+        if (job_id) {
+            messageContexts.delete(job_id);
+        }
         
         console.log(`✅ Message sent to ${chat_id}${reply_to_original ? ' (as reply)' : ''}: ${message}`);
         
@@ -530,7 +513,7 @@ async function handleApKaraCommand(sock, message) {
         
         // Send initial processing message
         await sock.sendMessage(chatId, {
-            text: "⏳ Processing your request... This may take up to 5 minutes."
+            text: "⏳ Processing your request... You will get a reply here when the order is placed."
         });
 
         // Get message text directly from the current message (not quoted)
@@ -0,0 +1,126 @@
+# Screenshots and DOM snapshots of a placement, written off the hot path
+# The flow used to save full-size PNGs into the working directory with
+# save_screenshot(), blocking the order while the file was written and
+# overwriting whatever a concurrent job had saved under the same name. Now a
+# capture grabs a JPEG screenshot (and optionally the page HTML) in memory
+# through DevTools, and a background thread compresses and writes it to a
+# directory of its own per job:
+#
+#   artifacts/20250101-101500_2200478050_3f2a9c1e/details.jpg
+#   artifacts/20250101-101500_2200478050_3f2a9c1e/error.jpg, error.html.gz
+#
+# Failures are always captured; captures on the success path only for a
+# sample of the orders (AP_ARTIFACT_SUCCESS_SAMPLE). Old job directories are
+# pruned by age and count. AP_ARTIFACTS=0 turns all of it off.
+import base64
+import gzip
+import os
+import queue
+import random
+import shutil
+import threading
+import time
+
+from log import log
+
+ARTIFACTS_ENABLED = os.environ.get("AP_ARTIFACTS", "1") != "0"
+ARTIFACT_DIR = os.environ.get("AP_ARTIFACT_DIR", "artifacts")
+ARTIFACT_RETENTION = float(os.environ.get("AP_ARTIFACT_RETENTION", str(3 * 24 * 60 * 60)))  # seconds
+ARTIFACT_MAX_JOBS = int(os.environ.get("AP_ARTIFACT_MAX_JOBS", "500"))
+SUCCESS_SAMPLE = float(os.environ.get("AP_ARTIFACT_SUCCESS_SAMPLE", "0.1"))  # 0..1
+CAPTURE_DOM = os.environ.get("AP_ARTIFACT_DOM", "1") != "0"  # HTML along with error screenshots
+JPEG_QUALITY = int(os.environ.get("AP_ARTIFACT_QUALITY", "60"))
+QUEUE_SIZE = 100  # captures waiting to be written; more are dropped
+PRUNE_EVERY = 20  # writes between two retention passes
+
+
+class ArtifactWriter:
+    def __init__(self, directory=ARTIFACT_DIR, retention=ARTIFACT_RETENTION, max_jobs=ARTIFACT_MAX_JOBS):
+        self.directory = directory
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def submit(self, job_dir, name, screenshot=None, html=None):
+        # screenshot: base64 JPEG as DevTools returns it; html: str
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait((job_dir, name, screenshot, html))
+        except queue.Full:
+            log.warning(f"⚠️ Artifact queue is full, dropping {job_dir}/{name}")
+
+    def _run(self):
+        while True:
+            job_dir, name, screenshot, html = self._queue.get()
+            try:
+                self._write(job_dir, name, screenshot, html)
+            except Exception as e:
+                log.warning(f"⚠️ Could not write artifact {job_dir}/{name}: {e}")
+
+    def _write(self, job_dir, name, screenshot, html):
+        path = os.path.join(self.directory, job_dir)
+        os.makedirs(path, exist_ok=True)
+        if screenshot:
+            with open(os.path.join(path, f"{name}.jpg"), "wb") as f:
+                f.write(base64.b64decode(screenshot))
+        if html:
+            with open(os.path.join(path, f"{name}.html.gz"), "wb") as f:
+                f.write(gzip.compress(html.encode("utf-8")))
+        log.info(f"📸 Saved {name} artifacts to {path}")
+
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 1:
+            self.prune()
+
+    def prune(self):
+        # Oldest first: past the retention, then beyond the newest max_jobs
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.is_dir()]
+        except OSError:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        cutoff = time.time() - self.retention
+        for i, entry in enumerate(entries):
+            if i >= self.max_jobs or entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+ARTIFACTS = ArtifactWriter()
+
+
+class ArtifactRecorder:
+    # Captures for one order; `sampled` decides whether its success-path
+    # captures are kept
+    def __init__(self, so_no, job_id=None, writer=ARTIFACTS):
+        self.writer = writer
+        self.job_dir = f"{time.strftime('%Y%m%d-%H%M%S')}_{so_no}_{(job_id or 'local')[:8]}"
+        self.sampled = random.random() < SUCCESS_SAMPLE
+        self.captured = []
+
+    @property
+    def path(self):
+        return os.path.join(self.writer.directory, self.job_dir) if self.captured else None
+
+    def capture(self, driver, name, failure=False, dom=False):
+        if not ARTIFACTS_ENABLED or not (failure or self.sampled):
+            return
+        try:
+            # JPEG at reduced quality is several times smaller and faster than
+            # the PNG save_screenshot() produces
+            screenshot = driver.execute_cdp_cmd(
+                "Page.captureScreenshot", {"format": "jpeg", "quality": JPEG_QUALITY})["data"]
+            html = None
+            if dom:
+                root = driver.execute_cdp_cmd("DOM.getDocument", {"depth": 0})["root"]
+                html = driver.execute_cdp_cmd("DOM.getOuterHTML", {"nodeId": root["nodeId"]})["outerHTML"]
+        except Exception as e:
+            log.warning(f"⚠️ Could not capture {name}: {e}")
+            return
+        self.writer.submit(self.job_dir, name, screenshot, html)
+        self.captured.append(name)
@@ -0,0 +1,60 @@
+# Fast entry for the portal's autocomplete fields (vehicle_noo, driverLicId)
+# Instead of typing a prefix key by key with sleeps in between, the value is
+# set once and a single input event is dispatched, which is what the page's
+# autocomplete handler listens to. We then wait for the suggestion list
+# (<field id>autocomplete-list) to be built.
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from log import log
+from waits import wait_for, ajax_idle, row_count_stable
+
+OPTION_XPATH = ".//div[input[@type='hidden']]"
+
+SET_VALUE_SCRIPT = """
+    var field = arguments[0];
+    field.focus();
+    field.value = arguments[1];
+    field.dispatchEvent(new Event('input', {bubbles: true}));
+"""
+
+
+def suggestions_ready(list_id):
+    # Ready once options are listed, or once the list exists and the page has
+    # stopped fetching suggestions (i.e. nothing matched)
+    settled = row_count_stable(f"#{list_id} > div")
+    idle = ajax_idle()
+
+    def _predicate(driver):
+        containers = driver.find_elements(By.ID, list_id)
+        if not containers:
+            return False
+        options = containers[0].find_elements(By.XPATH, OPTION_XPATH)
+        if options or (settled(driver) and idle(driver)):
+            return {"options": options}
+        return False
+    return _predicate
+
+
+def fetch_suggestions(driver, field, text, timeout=3):
+    # Put text into the autocomplete field and return the suggestion elements
+    list_id = f"{field.get_attribute('id')}autocomplete-list"
+
+    driver.execute_script(SET_VALUE_SCRIPT, field, text)
+    try:
+        return wait_for(driver, suggestions_ready(list_id), timeout)["options"]
+    except TimeoutException:
+        pass
+
+    if driver.find_elements(By.ID, list_id):
+        return []
+
+    # The handler did not react to the synthetic event, fall back to real
+    # keystrokes (sent in one call, without per-character sleeps)
+    log.debug(f"   Autocomplete on '{list_id}' ignored input event, typing instead")
+    field.clear()
+    field.send_keys(text)
+    try:
+        return wait_for(driver, suggestions_ready(list_id), timeout)["options"]
+    except TimeoutException:
+        return []
@@ -0,0 +1,222 @@
+# Replays a backlog of orders through a running service
+# After an outage the orders that piled up are in a CSV (one column per
+# /process-data field) or JSON lines file. They are read as a stream and
+# submitted to /process-data with at most --concurrency jobs in flight and
+# at most --rate orders per minute. Every finished order is appended to the
+# results file straight away and printed, with a progress summary (rate,
+# time left) every few seconds.
+#
+#   python backlog.py orders.csv --results orders.results.jsonl --concurrency 4 --rate 60
+#
+# Running the same command again resumes: orders already in the results
+# file are skipped (failed ones too, unless --retry-failed). Orders that were
+# still in flight when the run was interrupted are simply submitted again;
+# the service's idempotency journal hands back their job instead of placing
+# them twice. Rows missing a field placement needs are written as invalid
+# and never submitted.
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import requests
+
+from benchmark import POLL_INTERVAL, REQUEST_TIMEOUT, SERVICE_URL, submit
+from idempotency import order_key
+from message_parser import FIELDS, missing_fields
+
+PROGRESS_INTERVAL = 5.0  # seconds between progress lines while nothing finishes
+# Extra columns passed through to /process-data as they are
+PASSTHROUGH_FIELDS = ("chat_id", "message_key")
+
+
+def read_orders(path, fmt=None):
+    # (line number, row) as the file is read; row is None for a bad JSON line
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for line, row in enumerate(csv.DictReader(f), 2):
+                yield line, {k.strip(): (v or "").strip() or None for k, v in row.items() if k}
+        else:
+            for line, text in enumerate(f, 1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError:
+                    yield line, None
+
+
+def to_payload(row):
+    # Only the fields process_data() reads; without a chat the service does
+    # not call back into the bot
+    payload = {field: (str(row[field]) if row.get(field) is not None else None) for field in FIELDS}
+    for field in PASSTHROUGH_FIELDS:
+        payload[field] = row.get(field)
+    return payload
+
+
+def load_results(path):
+    # order key -> status of its latest result line
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for text in f:
+            try:
+                record = json.loads(text)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if record.get("key"):
+                done[record["key"]] = record.get("status")
+    return done
+
+
+class BacklogRunner:
+    def __init__(self, service_url, results_path, concurrency, rate, retry_failed=False):
+        self.service_url = service_url
+        self.results_path = results_path
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.retry_failed = retry_failed
+        self.done = load_results(results_path)
+        self.in_flight = {}  # job_id -> (line, key, payload, submitted_at)
+        self.keys_in_flight = set()
+        self.total = None
+        self.counts = {"success": 0, "failed": 0, "invalid": 0, "skipped": 0}
+        self.started = None
+        self._submitted = 0
+        self._last_progress = 0.0
+
+    def run(self, orders, total=None):
+        self.started = time.time()
+        self.total = total
+        with open(self.results_path, "a", encoding="utf-8") as results:
+            self._results = results
+            for line, row in orders:
+                self._add(line, row)
+            while self.in_flight:
+                self._poll()
+        self._progress(force=True)
+        return self.counts
+
+    def _add(self, line, row):
+        if not isinstance(row, dict):
+            self._write(line, None, {}, "invalid", {"message": "Not a JSON object"})
+            return
+        payload = to_payload(row)
+        key = order_key(payload)
+        previous = self.done.get(key) if key else None
+        if previous == "success" or (previous and not self.retry_failed) or key in self.keys_in_flight:
+            # Placed before, or the same order twice in this file
+            self.counts["skipped"] += 1
+            return
+        missing = missing_fields(payload)
+        if missing:
+            self._write(line, key, payload, "invalid", {"message": f"Missing {', '.join(missing)}"})
+            return
+
+        while len(self.in_flight) >= self.concurrency:
+            self._poll()
+        if self.rate:
+            # Evenly spaced submissions at `rate` orders per minute
+            delay = self.started + self._submitted * 60.0 / self.rate - time.time()
+            while delay > 0:
+                if self.in_flight:
+                    self._poll()
+                else:
+                    time.sleep(delay)
+                delay = self.started + self._submitted * 60.0 / self.rate - time.time()
+        try:
+            job_id = submit(self.service_url, payload)
+        except requests.RequestException as e:
+            self._write(line, key, payload, "failed", {"message": f"Could not submit: {e}"})
+            return
+        self._submitted += 1
+        self.in_flight[job_id] = (line, key, payload, time.time())
+        self.keys_in_flight.add(key)
+
+    def _poll(self):
+        for job_id, (line, key, payload, submitted_at) in list(self.in_flight.items()):
+            try:
+                job = requests.get(f"{self.service_url}/jobs/{job_id}", timeout=REQUEST_TIMEOUT).json()
+            except (requests.RequestException, ValueError) as e:
+                print(f"⚠️ Could not check job {job_id}: {e}", file=sys.stderr)
+                continue
+            if not job.get("finished_at"):
+                continue
+            del self.in_flight[job_id]
+            self.keys_in_flight.discard(key)
+            result = job.get("result") or {}
+            status = "success" if result.get("status") == "success" else "failed"
+            self._write(line, key, payload, status, {
+                "job_id": job_id,
+                "message": result.get("message"),
+                "seconds": round(time.time() - submitted_at, 2),
+            })
+        self._progress()
+        if self.in_flight:
+            time.sleep(POLL_INTERVAL)
+
+    def _write(self, line, key, payload, status, details):
+        record = {"line": line, "key": key, "so_no": payload.get("so_no"), "status": status, **details,
+                  "finished_at": time.time()}
+        # One line per order, flushed so an interrupted run loses nothing
+        self._results.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._results.flush()
+        self.counts[status] += 1
+        if key:
+            self.done[key] = status
+        marker = {"success": "✅", "failed": "❌", "invalid": "⚠️"}[status]
+        print(f"{marker} line {line} SO {payload.get('so_no')}: {status}"
+              + (f" ({details['message']})" if status != "success" and details.get("message") else ""))
+
+    def _progress(self, force=False):
+        now = time.time()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        finished = self.counts["success"] + self.counts["failed"]
+        elapsed = now - self.started
+        per_minute = finished / elapsed * 60 if elapsed else 0.0
+        line = (f"📦 {finished} placed or failed ({self.counts['success']} ok, {self.counts['failed']} failed), "
+                f"{len(self.in_flight)} in flight, {self.counts['invalid']} invalid, {self.counts['skipped']} skipped"
+                f" | {per_minute:.1f} orders/min")
+        if self.total:
+            remaining = self.total - finished - self.counts["invalid"] - self.counts["skipped"]
+            if per_minute and remaining > 0:
+                line += f", ~{remaining / per_minute:.0f} min left"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Place a backlog of orders from a CSV or JSON lines file")
+    parser.add_argument("orders", help="CSV with a header row, or JSON lines, with the /process-data fields")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the extension)")
+    parser.add_argument("--results", help="JSON lines file results are appended to (default: <orders>.results.jsonl)")
+    parser.add_argument("--service", default=SERVICE_URL, help="ap_kara.py base URL")
+    parser.add_argument("--concurrency", type=int, default=4, help="orders in flight at once")
+    parser.add_argument("--rate", type=float, default=0, help="orders per minute to submit at most (0 = no limit)")
+    parser.add_argument("--retry-failed", action="store_true", help="submit orders whose earlier result failed again")
+    args = parser.parse_args()
+
+    results = args.results or os.path.splitext(args.orders)[0] + ".results.jsonl"
+    # One cheap pass for the total, so the progress line can estimate the rest
+    total = sum(1 for _ in read_orders(args.orders, args.format))
+    runner = BacklogRunner(args.service, results, args.concurrency, args.rate, args.retry_failed)
+    print(f"📥 {total} order(s) in {args.orders}, {len(runner.done)} already in {results}")
+    try:
+        counts = runner.run(read_orders(args.orders, args.format), total)
+    except KeyboardInterrupt:
+        print(f"\n⏸️ Interrupted with {len(runner.in_flight)} order(s) in flight; run the same command to resume")
+        raise SystemExit(130)
+    print(f"🏁 {counts['success']} placed, {counts['failed']} failed, {counts['invalid']} invalid, "
+          f"{counts['skipped']} skipped; results in {results}")
+    if counts["failed"] or counts["invalid"]:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,326 @@
+# Throughput and latency benchmark for /process-data
+# Fires a stream of order payloads (the same JSON ap-kara.js sendToPython()
+# builds) at a running service that is pointed at mock_portal.py, waits for
+# every job through /jobs/<id>, and reports orders/minute, p50/p95/p99 per
+# step and end to end, and the memory / CPU used by Chrome and chromedriver.
+#
+#   python mock_portal.py --port 8080 --latency 0.05
+#   AP_PORTAL_URL=http://127.0.0.1:8080/AutoplantVC/transporter_report.do?method=getTransporterReport&status=planned \
+#   python ap_kara.py
+#   python benchmark.py --orders 50 --rate 120 --save benchmarks/baseline.json
+#   python benchmark.py --orders 50 --rate 120 --compare benchmarks/baseline.json
+#
+# Results are written as JSON so a run can be saved as a baseline and later
+# runs compared against it. To see what request blocking saves, run the
+# service with AP_MEASURE_NETWORK=1, once with AP_BLOCK_PROFILE=off (saved as
+# the baseline) and once with the profile under test (--compare).
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import threading
+import time
+
+import requests
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SERVICE_URL = "http://127.0.0.1:5000"
+PORTAL_URL = "http://127.0.0.1:8080"
+POLL_INTERVAL = 0.2  # seconds between /jobs polls
+SAMPLE_INTERVAL = 1.0  # seconds between browser resource samples
+REQUEST_TIMEOUT = 30  # seconds, same as the bot's axios timeout
+BROWSER_PROCESSES = ("chrome", "chromium", "chromedriver")
+PERCENTILES = (50, 95, 99)
+DESTINATIONS = ("PUNE", "NASHIK", "SATARA", "KOLHAPUR", "AHMEDNAGAR")
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile, None for an empty list
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values):
+    summary = {f"p{pct}": percentile(values, pct) for pct in PERCENTILES}
+    summary["count"] = len(values)
+    summary["mean"] = sum(values) / len(values) if values else None
+    return summary
+
+
+def master_data(portal_url):
+    # Vehicles and "NAME-LICENSE" drivers the mock portal knows about
+    response = requests.get(f"{portal_url}/mock/master-data", timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def build_payloads(count, master, seed=None):
+    # One order per distinct SO number, cycling through vehicles and drivers
+    rng = random.Random(seed)
+    first_so = 2200000000 + rng.randrange(0, 900000)
+    payloads = []
+    for i in range(count):
+        vehicle = master["vehicles"][i % len(master["vehicles"])]
+        name, license_no = master["drivers"][i % len(master["drivers"])].rsplit("-", 1)
+        payloads.append({
+            "driver_name": name.title(),
+            "driver_license": license_no[-4:],
+            "vehicle_num": vehicle,
+            "destination": rng.choice(DESTINATIONS),
+            "weight": str(rng.choice((20, 25, 30))),
+            "so_no": str(first_so + i),
+            "phone_num": f"98{rng.randrange(10 ** 8):08d}",
+            # No chat, so the service does not call back into the bot
+            "chat_id": None,
+            "message_key": None,
+        })
+    return payloads
+
+
+class BrowserSampler:
+    # Samples RSS and CPU of every Chrome / chromedriver process on the host
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._procs = {}
+
+    def start(self):
+        if psutil is None:
+            print("⚠️ psutil is not installed, browser memory and CPU are not measured")
+            return
+        self._thread = threading.Thread(target=self._run, name="browser-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _browser_processes(self):
+        for proc in psutil.process_iter(["name"]):
+            name = (proc.info["name"] or "").lower()
+            if any(p in name for p in BROWSER_PROCESSES):
+                # Keep Process objects so cpu_percent() measures since the last sample
+                yield self._procs.setdefault(proc.pid, proc)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = cpu = count = 0
+            for proc in list(self._browser_processes()):
+                try:
+                    rss += proc.memory_info().rss
+                    cpu += proc.cpu_percent(None)
+                    count += 1
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    self._procs.pop(proc.pid, None)
+            self.samples.append({"rss_mb": rss / 2 ** 20, "cpu_percent": cpu, "processes": count})
+            self._stop.wait(self.interval)
+
+    def summary(self):
+        if not self.samples:
+            return None
+        rss = [s["rss_mb"] for s in self.samples]
+        cpu = [s["cpu_percent"] for s in self.samples]
+        return {
+            "rss_mb_peak": max(rss),
+            "rss_mb_mean": sum(rss) / len(rss),
+            "cpu_percent_mean": sum(cpu) / len(cpu),
+            "cpu_percent_peak": max(cpu),
+            "processes_peak": max(s["processes"] for s in self.samples),
+            "samples": len(self.samples),
+        }
+
+
+def submit(service_url, payload):
+    response = requests.post(f"{service_url}/process-data", json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["job_id"]
+
+
+def wait_for_jobs(service_url, job_ids, timeout):
+    # Poll /jobs/<id> until every job finished or the deadline passes
+    pending = set(job_ids)
+    finished = {}
+    deadline = time.time() + timeout
+    while pending and time.time() < deadline:
+        for job_id in list(pending):
+            job = requests.get(f"{service_url}/jobs/{job_id}", timeout=REQUEST_TIMEOUT).json()
+            if job.get("finished_at"):
+                finished[job_id] = job
+                pending.discard(job_id)
+        if pending:
+            time.sleep(POLL_INTERVAL)
+    return finished, pending
+
+
+def run_benchmark(service_url, portal_url, orders, rate, timeout, seed=None):
+    requests.post(f"{portal_url}/mock/reset", json={}, timeout=REQUEST_TIMEOUT).raise_for_status()
+    payloads = build_payloads(orders, master_data(portal_url), seed)
+
+    sampler = BrowserSampler()
+    sampler.start()
+    started = time.time()
+    job_ids = []
+    try:
+        for i, payload in enumerate(payloads):
+            if rate:
+                # Open-loop arrivals at `rate` orders per minute
+                delay = started + i * 60.0 / rate - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            job_ids.append(submit(service_url, payload))
+        print(f"📤 Submitted {len(job_ids)} orders in {time.time() - started:.1f}s")
+        finished, unfinished = wait_for_jobs(service_url, job_ids, timeout)
+    finally:
+        sampler.stop()
+    elapsed = time.time() - started
+
+    end_to_end, placement, steps = [], [], {}
+    received, blocked, dom_ready = [], [], {}
+    succeeded = 0
+    for job in finished.values():
+        end_to_end.append(job["finished_at"] - job["created_at"])
+        result = job.get("result") or {}
+        if result.get("status") == "success":
+            succeeded += 1
+        for step, seconds in (result.get("timings") or {}).items():
+            if step == "total":
+                placement.append(seconds)
+            else:
+                steps.setdefault(step, []).append(seconds)
+        # Only there when the service runs with AP_MEASURE_NETWORK=1
+        network = result.get("network") or {}
+        if network:
+            received.append(sum(s["bytes"] for s in network.values()))
+            blocked.append(sum(s["blocked"] for s in network.values()))
+        for step, stats in network.items():
+            if "dom_ready" in stats:
+                dom_ready.setdefault(step, []).append(stats["dom_ready"])
+
+    browser = sampler.summary()
+    orders_per_minute = succeeded / elapsed * 60 if elapsed else 0.0
+    return {
+        "started_at": started,
+        "git_commit": _git_commit(),
+        "orders": orders,
+        "rate_per_minute": rate,
+        "elapsed_seconds": elapsed,
+        "succeeded": succeeded,
+        "failed": len(finished) - succeeded,
+        "unfinished": len(unfinished),
+        "orders_per_minute": orders_per_minute,
+        # Throughput per GB of browser memory, to compare AP_TABS_PER_BROWSER settings
+        "orders_per_minute_per_gb": orders_per_minute / (browser["rss_mb_peak"] / 1024)
+        if browser and browser["rss_mb_peak"] else None,
+        "end_to_end_seconds": summarize(end_to_end),
+        "placement_seconds": summarize(placement),
+        "step_seconds": {step: summarize(values) for step, values in sorted(steps.items())},
+        "received_bytes_per_order": summarize(received) if received else None,
+        "blocked_requests_per_order": summarize(blocked) if blocked else None,
+        "dom_ready_seconds": {step: summarize(values) for step, values in sorted(dom_ready.items())},
+        "browser": browser,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _fmt(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def print_report(report):
+    print(f"\n📊 {report['succeeded']}/{report['orders']} orders placed in {report['elapsed_seconds']:.1f}s "
+          f"({report['orders_per_minute']:.1f} orders/min, {report['failed']} failed, "
+          f"{report['unfinished']} unfinished)")
+    rows = [("end to end", report["end_to_end_seconds"]), ("placement", report["placement_seconds"])]
+    rows += sorted(report["step_seconds"].items())
+    rows += [(f"{step} (DOM ready)", summary) for step, summary in sorted(report.get("dom_ready_seconds", {}).items())]
+    print(f"   {'':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'count':>7}")
+    for name, summary in rows:
+        print(f"   {name:<22}{_fmt(summary['p50']):>9}{_fmt(summary['p95']):>9}"
+              f"{_fmt(summary['p99']):>9}{summary['count']:>7}")
+    browser = report.get("browser")
+    if browser:
+        print(f"   browsers: peak {browser['rss_mb_peak']:.0f} MB RSS over {browser['processes_peak']} processes, "
+              f"mean CPU {browser['cpu_percent_mean']:.0f}%")
+    if report.get("received_bytes_per_order"):
+        print(f"   network: {report['received_bytes_per_order']['p50'] / 1024:.0f} KB received per order (p50), "
+              f"{report['blocked_requests_per_order']['p50']} requests blocked")
+    if report.get("orders_per_minute_per_gb"):
+        print(f"   {report['orders_per_minute_per_gb']:.1f} orders/min per GB of browser memory")
+
+
+def compare(report, baseline):
+    # Relative change against a saved run; positive means slower / more
+    print(f"\n🔍 Compared with baseline from commit {baseline.get('git_commit') or '?'}")
+
+    def line(label, new, old, higher_is_better=False):
+        if new is None or not old:
+            return
+        change = (new - old) / old * 100
+        worse = change < 0 if higher_is_better else change > 0
+        marker = "⚠️" if worse and abs(change) >= 10 else "  "
+        print(f"{marker} {label:<30}{old:>10.3f}{new:>10.3f}{change:>+9.1f}%")
+
+    line("orders/min", report["orders_per_minute"], baseline.get("orders_per_minute"), higher_is_better=True)
+    line("orders/min per GB", report.get("orders_per_minute_per_gb"), baseline.get("orders_per_minute_per_gb"),
+         higher_is_better=True)
+    for pct in PERCENTILES:
+        line(f"end to end p{pct} (s)", report["end_to_end_seconds"][f"p{pct}"],
+             baseline.get("end_to_end_seconds", {}).get(f"p{pct}"))
+    for step, summary in report["step_seconds"].items():
+        old = baseline.get("step_seconds", {}).get(step, {})
+        line(f"{step} p95 (s)", summary["p95"], old.get("p95"))
+    if report.get("received_bytes_per_order") and baseline.get("received_bytes_per_order"):
+        line("received KB per order p50", report["received_bytes_per_order"]["p50"] / 1024,
+             baseline["received_bytes_per_order"]["p50"] / 1024)
+    if report.get("browser") and baseline.get("browser"):
+        line("browser peak RSS (MB)", report["browser"]["rss_mb_peak"], baseline["browser"]["rss_mb_peak"])
+        line("browser mean CPU (%)", report["browser"]["cpu_percent_mean"], baseline["browser"]["cpu_percent_mean"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /process-data against the mock portal")
+    parser.add_argument("--service", default=SERVICE_URL, help="ap_kara.py base URL")
+    parser.add_argument("--portal", default=PORTAL_URL, help="mock_portal.py base URL")
+    parser.add_argument("--orders", type=int, default=20, help="number of orders to place")
+    parser.add_argument("--rate", type=float, default=0, help="orders per minute to submit (0 = all at once)")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds to wait for all jobs")
+    parser.add_argument("--seed", type=int, help="random seed for SO numbers and payloads")
+    parser.add_argument("--save", help="write the report to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON file to compare this run with")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.service, args.portal, args.orders, args.rate, args.timeout, args.seed)
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to {args.save}")
+
+
+if __name__ == '__main__':
+    main()
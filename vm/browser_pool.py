@@ -0,0 +1,284 @@
+# Pool of warm, logged-in Chrome sessions for the order placement flow
+# Each session is parked on the Available Orders Report page, so a placement
+# can start searching for its SO number straight away instead of paying for
+# a cold browser start and a full login on every request.
+import os
+import shutil
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from chrome_profile import new_profile_dir
+from log import log
+from metrics import timed
+from network import add_network_options, apply_network_profile
+from portal_session import PortalSession
+from watchdog import BROWSER_MAX_RSS_MB, driver_pid, quit_driver, tree_rss_mb
+
+HEADLESS = os.environ.get("AP_HEADLESS", "1") != "0"
+CHROMEDRIVER_PATH = os.environ.get("AP_CHROMEDRIVER", "/usr/bin/chromedriver")
+
+# Pool sizing and recycling limits
+POOL_SIZE = int(os.environ.get("AP_POOL_SIZE", "2"))
+SESSION_MAX_AGE = float(os.environ.get("AP_SESSION_MAX_AGE", "1800"))  # seconds
+SESSION_MAX_USES = int(os.environ.get("AP_SESSION_MAX_USES", "25"))
+CHECKOUT_TIMEOUT = float(os.environ.get("AP_CHECKOUT_TIMEOUT", "120"))  # seconds
+# Idle sessions older than this reload the report page before use, which
+# also catches a portal login that expired while the browser was parked
+SESSION_REVALIDATE_AFTER = float(os.environ.get("AP_SESSION_REVALIDATE_AFTER", "600"))  # seconds
+
+# First remote debugging port; each live session gets its own port above it
+DEBUG_PORT_BASE = int(os.environ.get("AP_DEBUG_PORT_BASE", "9223"))
+
+# One portal login (cookie jar on disk) shared by every pooled browser
+PORTAL_SESSION = PortalSession()
+
+
+def build_chrome_options(temp_dir, debug_port, headless=HEADLESS):
+    options = Options()
+    if headless:
+        # Use new headless mode (more stable)
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-plugins")
+
+        # Window and display settings
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36")
+
+        # Background execution optimizations
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+        options.add_argument("--disable-renderer-backgrounding")
+
+        # UI and feature disabling
+        options.add_argument("--disable-features=TranslateUI")
+
+    # Block profile (images, fonts, trackers) and the eager page load strategy
+    add_network_options(options)
+
+    # Unique data directory and debugging port per session to avoid conflicts
+    options.add_argument(f"--user-data-dir={temp_dir}")
+    options.add_argument(f"--remote-debugging-port={debug_port}")
+    return options
+
+
+def driver_healthy(driver):
+    try:
+        # Any leftover JS alert would block every later command
+        try:
+            driver.switch_to.alert.dismiss()
+        except Exception:
+            pass
+        driver.execute_script("return document.readyState")
+        return True
+    except Exception:
+        return False
+
+
+class BrowserSession:
+    def __init__(self, driver, temp_dir, debug_port):
+        self.driver = driver
+        self.temp_dir = temp_dir
+        self.debug_port = debug_port
+        self.pid = driver_pid(driver)  # chromedriver, Chrome runs below it
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.uses = 0
+
+    def is_expired(self):
+        return (time.time() - self.created_at > SESSION_MAX_AGE
+                or self.uses >= SESSION_MAX_USES
+                or self.is_bloated())
+
+    def is_bloated(self):
+        # Chrome's memory creeps up over many orders, start over past the ceiling
+        if not BROWSER_MAX_RSS_MB:
+            return False
+        rss_mb = tree_rss_mb(self.pid)
+        if rss_mb > BROWSER_MAX_RSS_MB:
+            log.info(f"🐘 Chrome on port {self.debug_port} uses {rss_mb:.0f} MB (limit {BROWSER_MAX_RSS_MB:.0f} MB)")
+            return True
+        return False
+
+    def is_stale(self):
+        return time.time() - self.last_used > SESSION_REVALIDATE_AFTER
+
+    def is_healthy(self):
+        return driver_healthy(self.driver)
+
+    def close(self):
+        # Also kills whatever the quit left running
+        quit_driver(self.driver, f"Chrome on port {self.debug_port}", self.pid)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+def start_session(debug_port, headless=HEADLESS):
+    # A copy of the prebuilt profile on tmpfs (chrome_profile.py)
+    with timed("profile_clone"):
+        temp_dir = new_profile_dir()
+    options = build_chrome_options(temp_dir, debug_port, headless)
+
+    log.info(f"Starting Chrome driver on debugging port {debug_port}...")
+    try:
+        with timed("browser_start"):
+            driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
+    except Exception:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    session = BrowserSession(driver, temp_dir, debug_port)
+    try:
+        apply_network_profile(driver)
+        PORTAL_SESSION.open_orders_report(driver)
+    except Exception:
+        session.close()
+        raise
+
+    log.info(f"✅ Warm Chrome session ready on port {debug_port}")
+    return session
+
+
+class BrowserPool:
+    def __init__(self, size=POOL_SIZE, headless=HEADLESS, debug_port_base=DEBUG_PORT_BASE):
+        self.size = size
+        self.headless = headless
+        self.debug_port_base = debug_port_base
+        self._idle = []
+        self._ports_in_use = set()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _reserve_port(self):
+        # Caller holds self._cond; returns None once the pool is at capacity
+        if len(self._ports_in_use) >= self.size:
+            return None
+        port = self.debug_port_base
+        while port in self._ports_in_use:
+            port += 1
+        self._ports_in_use.add(port)
+        return port
+
+    def _release_port(self, port):
+        with self._cond:
+            self._ports_in_use.discard(port)
+            self._cond.notify()
+
+    def _spawn(self, port):
+        try:
+            session = start_session(port, self.headless)
+        except Exception as e:
+            log.error(f"❌ Could not start Chrome session on port {port}: {e}")
+            self._release_port(port)
+            return None
+        return session
+
+    def _spawn_idle(self, port):
+        session = self._spawn(port)
+        if session:
+            self._park(session)
+
+    def _park(self, session):
+        with self._cond:
+            if self._closed:
+                close_now = True
+            else:
+                close_now = False
+                self._idle.append(session)
+                self._cond.notify()
+        if close_now:
+            self.discard(session)
+
+    def warm(self):
+        # Fill the pool in the background so the server can start accepting requests
+        with self._cond:
+            ports = []
+            while True:
+                port = self._reserve_port()
+                if port is None:
+                    break
+                ports.append(port)
+        for port in ports:
+            threading.Thread(target=self._spawn_idle, args=(port,), daemon=True).start()
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        deadline = time.time() + timeout
+        while True:
+            port = None
+            session = None
+            with self._cond:
+                while not self._idle:
+                    port = self._reserve_port()
+                    if port is not None:
+                        break
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise Exception("❌ No browser session available, all sessions are busy")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    session = self._idle.pop()
+
+            if session is None:
+                # Pool has spare capacity, start a session for this request
+                session = self._spawn(port)
+                if session is None:
+                    raise Exception("❌ Could not start Chrome")
+            elif session.is_expired() or not session.is_healthy():
+                log.info(f"♻️ Recycling Chrome session on port {session.debug_port}")
+                self.discard(session)
+                continue
+            elif session.is_stale():
+                try:
+                    PORTAL_SESSION.open_orders_report(session.driver)
+                except Exception as e:
+                    log.warning(f"⚠️ Could not revalidate Chrome session on port {session.debug_port}: {e}")
+                    self.discard(session)
+                    continue
+
+            session.uses += 1
+            session.last_used = time.time()
+            return session
+
+    def checkin(self, session):
+        # Reset the session off the request thread so the response is not delayed
+        threading.Thread(target=self._recycle, args=(session,), daemon=True).start()
+
+    def _recycle(self, session):
+        if session.is_expired() or not session.is_healthy():
+            log.info(f"♻️ Recycling Chrome session on port {session.debug_port}")
+            port = session.debug_port
+            session.close()
+            # Start the replacement on the same port straight away
+            with self._cond:
+                reuse = not self._closed
+            if reuse:
+                self._spawn_idle(port)
+            else:
+                self._release_port(port)
+            return
+
+        try:
+            PORTAL_SESSION.open_orders_report(session.driver)
+        except Exception as e:
+            log.warning(f"⚠️ Could not reset Chrome session on port {session.debug_port}: {e}")
+            self.discard(session)
+            return
+        session.last_used = time.time()
+        self._park(session)
+
+    def discard(self, session):
+        session.close()
+        self._release_port(session.debug_port)
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self.discard(session)
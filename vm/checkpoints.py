@@ -0,0 +1,93 @@
+# Step checkpoints for the placement flow
+# Each placement keeps a small JSON file per SO number with the steps it
+# completed. When a placement is retried, after a failure at Steps 14-17 or a
+# Chrome crash, it resumes after the steps whose effect already lives on the
+# portal:
+#
+#   commit   Steps 6-9 are skipped, the SO is already in Commit/Allocated
+#            (also when the retry comes with a corrected vehicle or driver)
+#   confirm  this vehicle and driver are allocated, nothing is left to do
+#
+# Everything else (opening the order, filling the Place Vehicle form) only
+# exists in the browser, so a fresh or pooled session redoes it.
+import json
+import os
+import re
+import time
+
+from idempotency import order_key
+
+CHECKPOINT_DIR = os.environ.get("AP_CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_RETENTION = float(os.environ.get("AP_CHECKPOINT_RETENTION", str(24 * 60 * 60)))  # seconds
+
+PORTAL_STEPS = ("commit", "confirm")
+
+
+class Checkpoint:
+    def __init__(self, path, key=None, state=None):
+        self.path = path  # None when the order has no key and nothing is persisted
+        self.key = key
+        state = state or {}
+        self.steps = state.get("steps", {})  # step -> completed at
+        if state.get("key") != key:
+            # Another vehicle or driver was allocated, only the commit carries over
+            self.steps = {step: at for step, at in self.steps.items() if step == "commit"}
+        self.info = state.get("info", {})  # e.g. the committed order id
+        self.error = state.get("error")
+
+    def done(self, step):
+        return step in self.steps
+
+    def complete(self, step, **info):
+        self.steps[step] = time.time()
+        self.info.update(info)
+        if step in PORTAL_STEPS:
+            self.save()
+
+    def fail(self, message):
+        self.error = message
+        if any(step in self.steps for step in PORTAL_STEPS):
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"key": self.key, "steps": self.steps, "info": self.info, "error": self.error}, f)
+        os.replace(tmp_file, self.path)
+
+    def clear(self):
+        # The order is placed, a repeat is handled by the idempotency journal
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class CheckpointStore:
+    def __init__(self, directory=CHECKPOINT_DIR, retention=CHECKPOINT_RETENTION):
+        self.directory = directory
+        self.retention = retention
+
+    def _path(self, so_no):
+        return os.path.join(self.directory, re.sub(r"[^A-Za-z0-9]+", "_", so_no) + ".json")
+
+    def load(self, data):
+        key = order_key(data)
+        if key is None:
+            return Checkpoint(None)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(str(data.get('so_no')).strip())
+        try:
+            if time.time() - os.path.getmtime(path) > self.retention:
+                os.remove(path)
+                return Checkpoint(path, key)
+            with open(path) as f:
+                return Checkpoint(path, key, json.load(f))
+        except (OSError, ValueError):
+            return Checkpoint(path, key)
+
+
+CHECKPOINTS = CheckpointStore()
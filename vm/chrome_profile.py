@@ -0,0 +1,167 @@
+# Prebuilt Chrome profile cloned onto tmpfs for every browser session
+# A fresh mkdtemp() profile makes Chrome do its whole first-run setup on disk
+# (Local State, preferences, component databases) and fetch every portal
+# asset again before the first page is usable. Instead a template profile is
+# built once, by a real Chrome visiting the portal, and each session gets a
+# copy of it in /dev/shm, which also makes the rm -rf at the end cheap.
+#
+#   python chrome_profile.py --build            # (re)build the template
+#   python chrome_profile.py --benchmark 5      # cold starts: mkdtemp vs tmpfs vs template
+#
+# Without a template, sessions still get an empty profile on tmpfs.
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from log import log
+
+PROFILE_TEMPLATE = os.environ.get("AP_PROFILE_TEMPLATE", "chrome_profile_template")  # "" disables it
+PROFILE_ROOT = os.environ.get("AP_PROFILE_ROOT", "/dev/shm")
+PROFILE_MIN_FREE_MB = float(os.environ.get("AP_PROFILE_MIN_FREE_MB", "256"))
+PROFILE_PREFIX = "chrome_selenium_"
+
+# Files a running Chrome leaves behind that must not be cloned: the profile
+# lock, the session to restore and crash dumps
+VOLATILE = (
+    "SingletonLock", "SingletonSocket", "SingletonCookie", "DevToolsActivePort",
+    "lockfile", "Crashpad", "Crash Reports",
+    os.path.join("Default", "Sessions"), os.path.join("Default", "Current Session"),
+    os.path.join("Default", "Current Tabs"), os.path.join("Default", "Last Session"),
+    os.path.join("Default", "Last Tabs"),
+)
+
+
+def profile_root():
+    # tmpfs when it exists and has room, the regular temp dir otherwise
+    try:
+        if shutil.disk_usage(PROFILE_ROOT).free / 2 ** 20 >= PROFILE_MIN_FREE_MB:
+            return PROFILE_ROOT
+        log.warning(f"⚠️ Less than {PROFILE_MIN_FREE_MB:.0f} MB free in {PROFILE_ROOT}, using {tempfile.gettempdir()}")
+    except OSError:
+        pass
+    return None
+
+
+def new_profile_dir(template=PROFILE_TEMPLATE):
+    # A fresh user data dir for one browser session
+    profile_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX, dir=profile_root())
+    if template and os.path.isdir(template):
+        try:
+            shutil.copytree(template, profile_dir, symlinks=True, dirs_exist_ok=True)
+        except (OSError, shutil.Error) as e:
+            # A half copied profile is worse than an empty one
+            log.warning(f"⚠️ Could not clone Chrome profile template {template}: {e}")
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            profile_dir = tempfile.mkdtemp(prefix=PROFILE_PREFIX, dir=os.path.dirname(profile_dir))
+    return profile_dir
+
+
+def strip_volatile(profile_dir):
+    for name in VOLATILE:
+        path = os.path.join(profile_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+
+def build_template(template=PROFILE_TEMPLATE):
+    # Runs Chrome once through the portal login and the report page, then
+    # swaps the result in so running workers never clone a half built one
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from browser_pool import CHROMEDRIVER_PATH, DEBUG_PORT_BASE, PORTAL_SESSION, build_chrome_options
+    from network import apply_network_profile
+
+    build_dir = tempfile.mkdtemp(prefix="chrome_template_", dir=os.path.dirname(os.path.abspath(template)))
+    # A port above the ones the pooled sessions use
+    options = build_chrome_options(build_dir, DEBUG_PORT_BASE + 100)
+    driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH), options=options)
+    try:
+        apply_network_profile(driver)
+        PORTAL_SESSION.open_orders_report(driver)
+    finally:
+        driver.quit()
+    strip_volatile(build_dir)
+
+    old_dir = f"{template}.{os.getpid()}.old"
+    if os.path.isdir(template):
+        os.rename(template, old_dir)
+    os.rename(build_dir, template)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(template) for f in files)
+    print(f"📦 Chrome profile template ready in {template} ({size / 2 ** 20:.1f} MB)")
+
+
+def benchmark(runs):
+    # Cold start = new profile dir + Chrome start + portal report page ready
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from benchmark import summarize
+    from browser_pool import CHROMEDRIVER_PATH, DEBUG_PORT_BASE, PORTAL_SESSION, build_chrome_options
+    from network import apply_network_profile
+
+    modes = {
+        "mkdtemp": lambda: tempfile.mkdtemp(prefix=PROFILE_PREFIX),
+        "tmpfs": lambda: new_profile_dir(template=None),
+        "template": lambda: new_profile_dir(),
+    }
+    if not (PROFILE_TEMPLATE and os.path.isdir(PROFILE_TEMPLATE)):
+        print(f"⚠️ No template in {PROFILE_TEMPLATE}, run --build first; skipping that mode")
+        del modes["template"]
+
+    results = {}
+    for run in range(runs):
+        # Interleave the modes so they see the same portal and page cache
+        for mode, make_dir in modes.items():
+            started = time.perf_counter()
+            profile_dir = make_dir()
+            cloned = time.perf_counter()
+            driver = webdriver.Chrome(service=Service(CHROMEDRIVER_PATH),
+                                      options=build_chrome_options(profile_dir, DEBUG_PORT_BASE + 100))
+            try:
+                launched = time.perf_counter()
+                apply_network_profile(driver)
+                PORTAL_SESSION.open_orders_report(driver)
+                ready = time.perf_counter()
+            finally:
+                driver.quit()
+                removing = time.perf_counter()
+                shutil.rmtree(profile_dir, ignore_errors=True)
+                removed = time.perf_counter()
+            stats = results.setdefault(mode, {"profile": [], "launch": [], "report_page": [], "total": [],
+                                              "cleanup": []})
+            stats["profile"].append(cloned - started)
+            stats["launch"].append(launched - cloned)
+            stats["report_page"].append(ready - launched)
+            stats["total"].append(ready - started)
+            stats["cleanup"].append(removed - removing)
+            print(f"   run {run + 1} {mode:<9} {ready - started:.2f}s")
+
+    print(f"\n🧊 Cold start over {runs} run(s), p50 / p95 in seconds")
+    print(f"   {'':<10}" + "".join(f"{phase:>20}" for phase in ("profile", "launch", "report_page", "total", "cleanup")))
+    for mode, stats in results.items():
+        cells = []
+        for phase in ("profile", "launch", "report_page", "total", "cleanup"):
+            summary = summarize(stats[phase])
+            cells.append(f"{summary['p50']:.3f} / {summary['p95']:.3f}")
+        print(f"   {mode:<10}" + "".join(f"{cell:>20}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chrome profile template for the browser pool")
+    parser.add_argument("--build", action="store_true", help="build (or rebuild) the template profile")
+    parser.add_argument("--benchmark", type=int, metavar="RUNS", help="compare cold starts of each profile setup")
+    args = parser.parse_args()
+    if not (args.build or args.benchmark):
+        parser.error("nothing to do, pass --build and/or --benchmark RUNS")
+    if args.build:
+        build_template()
+    if args.benchmark:
+        benchmark(args.benchmark)
+
+
+if __name__ == '__main__':
+    main()
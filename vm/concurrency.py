@@ -0,0 +1,145 @@
+# Adaptive concurrency for the worker pool
+# With too many placements at once the portal slows down, and past a point
+# every wait in every order times out together. Instead of a fixed number of
+# concurrent orders the job queue lets AdaptiveLimiter decide which jobs may
+# leave the queue, AIMD style, from the step timings the workers send back
+# with each result:
+#
+#   a window of step observations with more than AP_CONCURRENCY_TIMEOUT_RATE
+#   timeouts, or steps running AP_CONCURRENCY_LATENCY_FACTOR times slower
+#   than their own baseline, cuts the limit by AP_CONCURRENCY_BACKOFF
+#   (at most once per AP_CONCURRENCY_COOLDOWN seconds)
+#   otherwise the limit grows by one after every `limit` orders that
+#   finished while all the allowed orders were running
+#
+# The limit stays between AP_CONCURRENCY_MIN and the pool's slots (workers x
+# tabs). AP_ADAPTIVE_CONCURRENCY=0 fixes it at the slots, as before.
+import os
+import threading
+import time
+from collections import deque
+
+from log import log
+from metrics import STEP_SECONDS
+
+ADAPTIVE_CONCURRENCY = os.environ.get("AP_ADAPTIVE_CONCURRENCY", "1") != "0"
+CONCURRENCY_MIN = int(os.environ.get("AP_CONCURRENCY_MIN", "1"))
+CONCURRENCY_START = os.environ.get("AP_CONCURRENCY_START")  # default: all slots
+TIMEOUT_RATE = float(os.environ.get("AP_CONCURRENCY_TIMEOUT_RATE", "0.1"))  # share of steps
+LATENCY_FACTOR = float(os.environ.get("AP_CONCURRENCY_LATENCY_FACTOR", "2.0"))  # x the step's baseline
+BACKOFF = float(os.environ.get("AP_CONCURRENCY_BACKOFF", "0.5"))  # limit kept on a decrease
+COOLDOWN = float(os.environ.get("AP_CONCURRENCY_COOLDOWN", "30"))  # seconds between decreases
+WINDOW = 50  # latest step observations the decisions look at
+MIN_SAMPLES = 10  # observations needed before the window can cut the limit
+BASELINE_ALPHA = 0.05  # how fast a step's baseline follows its healthy durations
+MIN_STEP_SECONDS = 0.05  # steps faster than this hardly touch the portal, their ratio is noise
+# Outcomes that carry no portal timing: the step gave up for another reason
+IGNORED_OUTCOMES = ("error", "failed_optional")
+
+
+class AdaptiveLimiter:
+    def __init__(self, slots, minimum=CONCURRENCY_MIN, start=CONCURRENCY_START, adaptive=ADAPTIVE_CONCURRENCY):
+        self.maximum = slots
+        self.minimum = max(1, min(minimum, slots))
+        self.limit = min(slots, max(self.minimum, int(start))) if start else slots
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._baselines = {}  # step -> typical healthy duration in seconds
+        self._window = deque(maxlen=WINDOW)  # (timed_out, ratio to baseline or None)
+        self._saturated_done = 0  # orders finished at the limit since it last changed
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        # The job queue calls this before a job leaves pending, and waits for
+        # a finished job when it returns False
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def observe(self, observations):
+        # observations: what REGISTRY.drain() returned in the worker for the order
+        if self.adaptive:
+            with self._lock:
+                self._observe(observations)
+
+    def release(self):
+        with self._lock:
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+            if self.adaptive:
+                self._adjust(saturated)
+
+    def _observe(self, observations):
+        for name, seconds, labels in observations:
+            if name != STEP_SECONDS or labels.get("outcome") in IGNORED_OUTCOMES:
+                continue
+            step = labels.get("step")
+            if labels.get("outcome") == "timeout":
+                self._window.append((True, None))
+                continue
+            baseline = self._baselines.get(step)
+            if baseline is None:
+                self._baselines[step] = seconds
+                continue
+            if baseline < MIN_STEP_SECONDS:
+                self._baselines[step] = baseline + BASELINE_ALPHA * (seconds - baseline)
+                continue
+            ratio = seconds / baseline
+            self._window.append((False, ratio))
+            if ratio < LATENCY_FACTOR or self.limit == self.minimum:
+                # Slow outliers do not move the baseline, or congestion
+                # would slowly become the new normal; at the minimum our
+                # load is not what slows the portal down
+                self._baselines[step] = baseline + BASELINE_ALPHA * (seconds - baseline)
+
+    def _congestion(self):
+        # A reason to back off, or None
+        if len(self._window) < MIN_SAMPLES:
+            return None
+        timeouts = sum(timed_out for timed_out, _ in self._window)
+        if timeouts / len(self._window) > TIMEOUT_RATE:
+            return f"{timeouts} of the last {len(self._window)} steps timed out"
+        ratios = sorted(ratio for timed_out, ratio in self._window if not timed_out)
+        if len(ratios) >= MIN_SAMPLES:
+            median = ratios[len(ratios) // 2]
+            if median > LATENCY_FACTOR:
+                return f"steps run {median:.1f}x slower than their baseline"
+        return None
+
+    def _adjust(self, saturated):
+        now = time.time()
+        reason = self._congestion()
+        if reason:
+            if now - self._last_decrease < COOLDOWN or self.limit == self.minimum:
+                return
+            old, self.limit = self.limit, max(self.minimum, int(self.limit * BACKOFF))
+            self._last_decrease = now
+            self._saturated_done = 0
+            # Judge the new limit on its own observations
+            self._window.clear()
+            self.decreases += 1
+            log.warning(f"📉 Portal is struggling ({reason}), concurrent orders {old} -> {self.limit}")
+            return
+
+        if saturated:
+            self._saturated_done += 1
+        # Only grow once the current limit has shown it is healthy
+        if (self._saturated_done >= self.limit and self.limit < self.maximum
+                and len(self._window) >= MIN_SAMPLES):
+            old, self.limit = self.limit, self.limit + 1
+            self._saturated_done = 0
+            self.increases += 1
+            log.info(f"📈 Portal keeps up, concurrent orders {old} -> {self.limit}")
+
+    def gauges(self):
+        return {
+            'ap_concurrency_limit': ('Orders the adaptive limiter currently lets run at once', self.limit),
+            'ap_concurrency_in_flight': ('Orders being placed right now', self.in_flight),
+            'ap_concurrency_increases': ('Times the concurrency limit was raised since start', self.increases),
+            'ap_concurrency_decreases': ('Times the concurrency limit was cut since start', self.decreases),
+        }
@@ -0,0 +1,307 @@
+# Browserless order placement ("HTTP engine")
+# Replays the portal's form posts and XHRs with a pooled requests.Session
+# instead of driving Chrome. The requests themselves are described in an
+# endpoint map (AP_HTTP_ENDPOINTS, see http_endpoints.example.json) recorded
+# from the portal, so a portal change only needs a new map. Anything the map
+# does not cover, or any reply that does not look the way we expect, raises
+# HttpEngineUnsupported and the Selenium flow takes over, up to the place
+# vehicle submit: after it only HttpEngineError is raised, so a vehicle the
+# portal may already have allocated is never placed again in Chrome. The optional
+# "vehicle_master" / "driver_master" requests return the full autocomplete
+# lists and keep the master data cache (master_data.py) filled.
+import json
+import os
+import re
+import threading
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from checkpoints import CHECKPOINTS
+from log import log
+from master_data import MASTER_DATA, license_suffix
+from metrics import mark_step
+from portal import PORTAL_URL, USERNAME, PASSWORD
+from portal_alerts import COMMIT_RESULT, REFRESH, parse_alert
+from portal_session import COOKIE_FILE
+
+ENDPOINTS_FILE = os.environ.get("AP_HTTP_ENDPOINTS", "http_endpoints.json")
+REQUEST_TIMEOUT = 15  # seconds
+POOL_MAXSIZE = 16  # keep-alive connections to the portal
+
+REQUIRED_ENDPOINTS = (
+    "available_search", "commit", "allocated_search", "place_vehicle_form",
+    "vehicle_suggest", "driver_suggest", "place_vehicle_submit",
+)
+
+LOGIN_FORM_RE = re.compile(r'<form[^>]*action="([^"]*)"[^>]*>(.*?)</form>', re.I | re.S)
+INPUT_RE = re.compile(r'<input[^>]*>', re.I)
+ATTR_RE = re.compile(r'(\w+)="([^"]*)"')
+LABEL_RE = '<[^>]*id="{}"[^>]*>\\s*([^<]*?)\\s*<'
+
+
+class HttpEngineUnsupported(Exception):
+    # Raised when a step cannot be done over plain HTTP; safe to retry in Chrome
+    pass
+
+
+class HttpEngineError(Exception):
+    # The portal answered but refused the order (no fallback will help)
+    pass
+
+
+def load_endpoints(path=ENDPOINTS_FILE):
+    try:
+        with open(path) as f:
+            endpoints = json.load(f)
+    except (OSError, ValueError):
+        return None
+    missing = [name for name in REQUIRED_ENDPOINTS if name not in endpoints]
+    if missing:
+        log.warning(f"⚠️ HTTP engine disabled, endpoint map is missing: {', '.join(missing)}")
+        return None
+    return endpoints
+
+
+def _fill(template, fields):
+    # Substitute {so_no}, {order_id}, ... into every string of a request spec
+    if isinstance(template, str):
+        return template.format_map(fields)
+    if isinstance(template, dict):
+        return {k: _fill(v, fields) for k, v in template.items()}
+    if isinstance(template, list):
+        return [_fill(v, fields) for v in template]
+    return template
+
+
+def _is_login_page(text):
+    return 'name="username"' in text and 'name="password"' in text
+
+
+def _label_value(html, element_id):
+    match = re.search(LABEL_RE.format(re.escape(element_id)), html)
+    if not match:
+        raise HttpEngineUnsupported(f"'{element_id}' not found in place vehicle form")
+    return float(match.group(1))
+
+
+def _suggestion_texts(payload):
+    # Autocomplete endpoints answer with a list of strings or of {label, value}
+    texts = []
+    for item in payload if isinstance(payload, list) else []:
+        if isinstance(item, dict):
+            texts.append(str(item.get("label") or item.get("value") or ""))
+        else:
+            texts.append(str(item))
+    return texts
+
+
+class PortalHttpClient:
+    def __init__(self, endpoints, base_url=PORTAL_URL, cookie_file=COOKIE_FILE):
+        self.endpoints = endpoints
+        self.base_url = base_url
+        self.cookie_file = cookie_file
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self._login_lock = threading.Lock()
+        self._load_cookies()
+
+    def _load_cookies(self):
+        # Share the login with the browsers (same cookie file as PortalSession)
+        try:
+            with open(self.cookie_file) as f:
+                cookies = json.load(f)
+        except (OSError, ValueError):
+            return
+        for cookie in cookies:
+            self.http.cookies.set(cookie["name"], cookie["value"],
+                                  domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+    def login(self):
+        with self._login_lock:
+            page = self.http.get(self.base_url, timeout=REQUEST_TIMEOUT)
+            if not _is_login_page(page.text):
+                return
+            form = LOGIN_FORM_RE.search(page.text)
+            if not form:
+                raise HttpEngineUnsupported("Login form not found")
+
+            fields = {}
+            for tag in INPUT_RE.findall(form.group(2)):
+                attrs = dict(ATTR_RE.findall(tag))
+                if attrs.get("name"):
+                    fields[attrs["name"]] = attrs.get("value", "")
+            fields["username"] = USERNAME
+            fields["password"] = PASSWORD
+
+            response = self.http.post(urljoin(page.url, form.group(1)), data=fields, timeout=REQUEST_TIMEOUT)
+            if _is_login_page(response.text):
+                raise HttpEngineError("❌ Could not log in, Wrong Username or Password")
+            log.info("🔐 HTTP engine logged in")
+
+    def call(self, name, **fields):
+        spec = _fill(self.endpoints[name], fields)
+        for attempt in range(2):
+            response = self.http.request(
+                spec.get("method", "GET"),
+                urljoin(self.base_url, spec["path"]),
+                params=spec.get("params"),
+                data=spec.get("data"),
+                headers={"X-Requested-With": "XMLHttpRequest"},
+                timeout=REQUEST_TIMEOUT,
+            )
+            if attempt == 0 and _is_login_page(response.text):
+                # Session expired, log in once and replay the request
+                self.login()
+                continue
+            response.raise_for_status()
+            return response
+        raise HttpEngineUnsupported(f"Still on the login page after logging in ({name})")
+
+    def search_rows(self, name, so_no):
+        # jqGrid JSON: {"rows": [{"id": "2200478050_010_1", "cell": [...]}, ...]}
+        try:
+            rows = self.call(name, so_no=so_no).json().get("rows", [])
+        except ValueError:
+            raise HttpEngineUnsupported(f"{name} did not return jqGrid JSON")
+        return [str(row.get("id")) for row in rows if str(row.get("id", "")).startswith(f"{so_no}_")]
+
+    def suggestions(self, name, term):
+        try:
+            return _suggestion_texts(self.call(name, term=term).json())
+        except ValueError:
+            raise HttpEngineUnsupported(f"{name} did not return JSON")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # One keep-alive session per worker process
+    global _client
+    with _client_lock:
+        if _client is None:
+            endpoints = load_endpoints()
+            if endpoints is None:
+                raise HttpEngineUnsupported(f"No HTTP endpoint map at {ENDPOINTS_FILE}")
+            _client = PortalHttpClient(endpoints)
+        return _client
+
+
+def place_order_http(data):
+    from placement import order_quantity
+
+    client = get_client()
+    if MASTER_DATA.needs_refresh() and "vehicle_master" in client.endpoints and "driver_master" in client.endpoints:
+        MASTER_DATA.refresh(lambda: client.suggestions("vehicle_master", ""),
+                            lambda: client.suggestions("driver_master", ""))
+    so_no = str(data.get('so_no'))
+    vehicle_num = str(data.get('vehicle_num'))
+    license_num = str(data.get('driver_license'))
+
+    checkpoint = CHECKPOINTS.load(data)
+    if checkpoint.done("confirm"):
+        log.info(f"⏭️ Resuming: SO {so_no} was already allocated to {vehicle_num}, nothing left to do")
+        checkpoint.clear()
+        return
+
+    # Steps 6-9: commit the order if it is still in Available Orders
+    if not checkpoint.done("commit"):
+        mark_step("search")
+        order_ids = client.search_rows("available_search", so_no)
+        if order_ids:
+            mark_step("commit")
+            reply = parse_alert(client.call("commit", so_no=so_no, order_id=order_ids[0]).text)
+            if not reply.committed(so_no):
+                raise HttpEngineUnsupported(f"Unexpected commit reply: {reply.text[:200]}")
+            checkpoint.complete("commit", order_id=order_ids[0])
+            log.info(f"✅ HTTP engine committed {order_ids[0]}")
+
+    # Steps 10-13: find the committed order and open its place vehicle form
+    mark_step("search_committed")
+    allocated = client.search_rows("allocated_search", so_no)
+    if not allocated:
+        raise HttpEngineError(f"❌ Failed: S.O. number {so_no} not found")
+    order_id = allocated[0]
+    mark_step("place_vehicle")
+    form = client.call("place_vehicle_form", so_no=so_no, order_id=order_id).text
+    if parse_alert(form).kind == REFRESH:
+        raise HttpEngineUnsupported("Portal asked for a page refresh")
+
+    # Step 14: vehicle, typed in full when the master data already knows it
+    mark_step("vehicle")
+    vehicle = None
+    cached_vehicle = MASTER_DATA.vehicle_option(vehicle_num)
+    for term in ([vehicle_num] if cached_vehicle else []) + [vehicle_num[:3]]:
+        texts = client.suggestions("vehicle_suggest", term)
+        MASTER_DATA.learn_vehicles(texts)
+        vehicle = next((t for t in texts if vehicle_num in t), None)
+        if vehicle:
+            break
+    if vehicle is None:
+        raise HttpEngineError(f"❌ Vehicle number '{vehicle_num}' not found in the dropdown list or input field not accessible")
+
+    # Step 15: driver, matched on the last 4 digits of the license
+    mark_step("driver")
+    driver_option = None
+    terms = [word[:3].upper() for word in str(data.get('driver_name') or '').split()]
+    cached_driver = MASTER_DATA.driver_option(license_num, data.get('driver_name'))
+    cached_term = MASTER_DATA.driver_search_term(cached_driver) if cached_driver else None
+    if cached_term:
+        terms.insert(0, cached_term)
+    for term in terms:
+        texts = client.suggestions("driver_suggest", term)
+        MASTER_DATA.learn_drivers(texts)
+        driver_option = next((text for text in texts if license_suffix(text) == license_num), None)
+        if driver_option:
+            break
+    if driver_option is None:
+        raise HttpEngineError("❌ Could not find driver")
+
+    # Step 17: quantity
+    mark_step("qty")
+    qty = order_quantity(data.get('weight'), _label_value(form, "remQty"), _label_value(form, "remVehCC"))
+    if qty is None:
+        raise HttpEngineError("❌ Could not input quantity")
+
+    # Steps 18-20: submit and confirm the allocation
+    # Once the submit has gone out the portal may have allocated the vehicle
+    # whatever we got back, so nothing after this point falls back to Chrome
+    mark_step("submit")
+    try:
+        reply = client.call("place_vehicle_submit", so_no=so_no, order_id=order_id, vehicle=vehicle,
+                            driver=driver_option, mobile=data.get('phone_num') or '', qty=qty).text
+    except (HttpEngineUnsupported, requests.RequestException) as e:
+        raise HttpEngineError(f"❌ No reply to the place vehicle request for {order_id} ({e}), "
+                              f"check the portal before placing it again")
+    if "success" not in reply.lower():
+        raise HttpEngineError(f"❌ Unexpected place vehicle reply for {order_id}, check the portal "
+                              f"before placing it again: {reply[:200]}")
+    checkpoint.complete("confirm")
+    log.info(f"🏁 HTTP engine placed {order_id} on {vehicle}")
+    checkpoint.clear()
+
+
+def commit_orders_batch_http(so_numbers):
+    # Steps 6-9 for several SOs with one commit request (order ids joined by
+    # commas, the way the Commit button posts them)
+    from placement import add_commit_results
+
+    client = get_client()
+    results = {so: {'order_ids': [], 'committed': False} for so in so_numbers}
+    order_ids = []
+    for so in so_numbers:
+        order_ids += client.search_rows("available_search", so)
+    if not order_ids:
+        return results
+
+    reply = parse_alert(client.call("commit", so_no=so_numbers[0], order_id=",".join(order_ids)).text)
+    if reply.kind != COMMIT_RESULT or not reply.orders:
+        raise HttpEngineUnsupported(f"Unexpected commit reply: {reply.text[:200]}")
+    add_commit_results(results, reply)
+    log.info(f"✅ HTTP engine committed {sum(r['committed'] for r in results.values())} of {len(so_numbers)} SO number(s)")
+    return results
@@ -0,0 +1,82 @@
+# Idempotency journal for order placements
+# Every placement is journalled under (so_no, vehicle_num, driver_license) in
+# an append-only JSON lines file. When the same order comes in again (the
+# WhatsApp message is re-sent, or ap-kara.js retries after its timeout) the
+# queued, running or succeeded job is handed back instead of starting a
+# second Chrome run and committing twice. Failed placements can be retried.
+import json
+import os
+import threading
+import time
+
+from log import log
+
+JOURNAL_FILE = os.environ.get("AP_JOURNAL_FILE", "placements.jsonl")
+JOURNAL_RETENTION = float(os.environ.get("AP_JOURNAL_RETENTION", str(3 * 24 * 60 * 60)))  # seconds
+
+# Statuses that make a repeat of the same order a duplicate
+BLOCKING_STATUSES = ("queued", "running", "succeeded")
+
+
+def order_key(data):
+    # None when the order cannot be identified (no SO number)
+    so_no = str(data.get('so_no') or '').strip()
+    if not so_no:
+        return None
+    vehicle_num = ''.join(str(data.get('vehicle_num') or '').split()).upper()
+    license_num = str(data.get('driver_license') or '').strip()
+    return f"{so_no}|{vehicle_num}|{license_num}"
+
+
+class IdempotencyJournal:
+    def __init__(self, path=JOURNAL_FILE, retention=JOURNAL_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._entries = {}  # key -> latest record
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line after a crash
+            self._entries[record["key"]] = record
+
+        cutoff = time.time() - self.retention
+        for key, record in list(self._entries.items()):
+            if record["updated_at"] < cutoff:
+                del self._entries[key]
+            elif record["status"] in ("queued", "running"):
+                # The process stopped before the job finished, let it run again
+                record["status"] = "interrupted"
+        self._compact()
+        log.info(f"📒 Loaded {len(self._entries)} journalled placement(s)")
+
+    def _compact(self):
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            for record in self._entries.values():
+                f.write(json.dumps(record) + "\n")
+        os.replace(tmp_file, self.path)
+
+    def lookup(self, key):
+        # The journalled placement a new request for `key` should reuse, if any
+        with self._lock:
+            record = self._entries.get(key)
+        if record and record["status"] in BLOCKING_STATUSES:
+            return record
+        return None
+
+    def record(self, key, job_id, status, result=None):
+        record = {"key": key, "job_id": job_id, "status": status, "result": result, "updated_at": time.time()}
+        with self._lock:
+            self._entries[key] = record
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
@@ -0,0 +1,325 @@
+# In-process job queue for order placements
+# /process-data only enqueues the order and answers 202 with a job id; worker
+# threads run the Selenium flow, and the outcome is posted back to the
+# WhatsApp bot through its /send-message endpoint.
+# Jobs touching the same SO number or vehicle never run at the same time, so
+# the Commit and Place Vehicle steps of one order cannot race another, and
+# with an idempotency journal a repeated order reuses the earlier job.
+import os
+import threading
+import time
+import uuid
+
+import requests
+
+from idempotency import order_key
+from log import log, log_context
+
+BOT_URL = os.environ.get("AP_BOT_URL", "http://localhost:3000")
+CALLBACK_TIMEOUT = 10  # seconds
+JOB_RETENTION = 60 * 60  # Finished jobs are forgotten after an hour
+
+
+def format_result_message(result):
+    # Same wording the bot used when it waited for the response itself
+    if result.get('status') == 'success':
+        message = '✅ *Processing Completed Successfully!*\n\n'
+        message += '📋 *Processed Data:*\n'
+
+        processed_data = result.get('processed_data') or {}
+        labels = [
+            ('driver_name', '👤 Driver Name: {}'),
+            ('driver_license', '🆔 License: {}'),
+            ('vehicle_num', '🚛 Vehicle: {}'),
+            ('destination', '📍 Destination: {}'),
+            ('weight', '⚖️ Weight: {} MT'),
+            ('so_no', '📋 SO Number: {}'),
+            ('phone_num', '📞 Phone: {}'),
+        ]
+        for key, label in labels:
+            if processed_data.get(key):
+                message += label.format(processed_data[key]) + '\n'
+
+        message += '\n🎉 All processes executed successfully!'
+        return message
+
+    message = '❌ *Processing Failed*\n\n'
+    message += f"*Error:* {result.get('message') or 'An unexpected error occurred while processing your request.'}"
+    message += '\n\n🔄 Please try again or contact support if the issue persists.'
+    return message
+
+
+class Job:
+    def __init__(self, data, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.data = data
+        self.status = 'queued'
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # (chat_id, order) of repeated requests that arrived while the job was
+        # queued or running; they get the result too
+        self.watchers = []
+
+        # A batch job ({'orders': [...]}) places several orders in one go
+        self.orders = data['orders'] if 'orders' in data else [data]
+
+        # Portal objects this job works on; only one job may hold each at a time
+        self.lock_keys = set()
+        for order in self.orders:
+            if order.get('so_no'):
+                self.lock_keys.add(f"so:{order['so_no']}")
+            if order.get('vehicle_num'):
+                self.lock_keys.add(f"vehicle:{str(order['vehicle_num']).upper()}")
+
+    def describe(self):
+        # For log lines: "SO 2200478050" or "3 orders"
+        if 'orders' in self.data:
+            return f"{len(self.orders)} orders"
+        return f"SO {self.data.get('so_no')}"
+
+    def to_dict(self):
+        if 'orders' in self.data:
+            so_no = [order.get('so_no') for order in self.orders]
+            vehicle_num = [order.get('vehicle_num') for order in self.orders]
+        else:
+            so_no, vehicle_num = self.data.get('so_no'), self.data.get('vehicle_num')
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'so_no': so_no,
+            'vehicle_num': vehicle_num,
+            'result': self.result,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    def __init__(self, handler, workers=1, bot_url=BOT_URL, journal=None, limiter=None):
+        # handler(data, job_id) runs one placement and returns its result dict
+        self.handler = handler
+        self.workers = workers
+        self.bot_url = bot_url
+        self.journal = journal  # IdempotencyJournal, or None to run every request
+        self.limiter = limiter  # AdaptiveLimiter, or None to run a job on every worker thread
+        self._pending = []  # Jobs not started yet, in arrival order
+        self._active_keys = set()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._submit_lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"placement-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, data):
+        job = Job(data)
+        self._enqueue(job)
+        return job
+
+    def _enqueue(self, job):
+        with self._lock:
+            self._forget_old_jobs()
+            self._jobs[job.id] = job
+        with self._cond:
+            self._pending.append(job)
+            waiting = len(self._pending)
+            self._cond.notify()
+        log.info(f"📥 Queued job {job.id} for {job.describe()} ({waiting} waiting)")
+
+    def submit_once(self, data):
+        # Like submit(), but an order that is already queued, running or placed
+        # returns that job instead; the second value tells which happened
+        if not self.journal:
+            return self.submit(data), False
+        if 'orders' in data:
+            return self._submit_batch_once(data)
+        key = order_key(data)
+        if key is None:
+            return self.submit(data), False
+
+        with self._submit_lock:
+            record = self.journal.lookup(key)
+            if record is None:
+                # Journalled before a worker can pick it up and record progress
+                job = Job(data)
+                self.journal.record(key, job.id, job.status)
+                self._enqueue(job)
+                return job, False
+        return self._duplicate(record, data), True
+
+    def _submit_batch_once(self, data):
+        # Every order of a batch is checked on its own: orders already queued,
+        # running or placed (alone or in another batch) are left out, the
+        # rest are journalled as queued under the new job straight away
+        with self._submit_lock:
+            fresh, duplicates, keys = [], [], set()
+            for order in data['orders']:
+                key = order_key(order)
+                record = self.journal.lookup(key) if key else None
+                if record is not None:
+                    duplicates.append((record, order))
+                elif key is None or key not in keys:
+                    fresh.append(order)
+                    keys.add(key)
+            if fresh:
+                job = Job({**data, 'orders': fresh})
+                for order in fresh:
+                    key = order_key(order)
+                    if key:
+                        self.journal.record(key, job.id, job.status)
+                self._enqueue(job)
+
+        for record, order in duplicates:
+            self._duplicate(record, order)
+        if fresh:
+            return job, False
+        # The whole batch was sent before
+        return self._duplicate(*duplicates[0], answer=False), True
+
+    def _duplicate(self, record, data, answer=True):
+        with self._lock:
+            job = self._jobs.get(record["job_id"])
+            if job is None:
+                # Placed before a restart, rebuild the finished job from the journal
+                job = Job(data, job_id=record["job_id"])
+                job.status, job.result = record["status"], record["result"]
+                job.started_at = job.finished_at = record["updated_at"]
+                self._jobs[job.id] = job
+            # Checked under the lock _notify() takes the watchers with, so a
+            # job finishing right now either sees this watcher or is seen done
+            finished = job.finished_at is not None
+            if answer and not finished:
+                job.watchers.append((data.get('chat_id'), data))
+        log.info(f"♻️ SO {data.get('so_no')} is already {job.status} as job {job.id}, not placing it again")
+        if answer and finished:
+            # Answer the repeated message with the earlier result
+            threading.Thread(target=self._send, args=(job, data.get('chat_id'), record["result"] or job.result),
+                             daemon=True).start()
+        return job
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _forget_old_jobs(self):
+        # Caller holds self._lock
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _next_job(self):
+        # Oldest job whose SO/vehicle is not busy. Keys of jobs that are skipped
+        # stay reserved too, so same-SO jobs still run in arrival order. The
+        # job stays pending until the limiter lets one more order run.
+        with self._cond:
+            while True:
+                reserved = set(self._active_keys)
+                for job in self._pending:
+                    if not job.lock_keys & reserved:
+                        if self.limiter and not self.limiter.try_acquire():
+                            break
+                        self._pending.remove(job)
+                        self._active_keys |= job.lock_keys
+                        return job
+                    reserved |= job.lock_keys
+                self._cond.wait()
+
+    def _release(self, job):
+        with self._cond:
+            self._active_keys -= job.lock_keys
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            # Everything logged for this job carries its id (and SO number)
+            with log_context(job_id=job.id, so_no=job.data.get('so_no')):
+                self._run(job)
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        self._journal(job)
+        log.info(f"▶️ Running job {job.id} for {job.describe()}")
+        try:
+            result = self.handler(job.data, job.id)
+        except Exception as e:
+            log.exception(f"❌ Job {job.id} raised: {e}")
+            result = {'status': 'error', 'message': str(e), 'processed_data': None}
+        if self.limiter:
+            # _release() below wakes the workers waiting for the limiter too
+            self.limiter.release()
+
+        job.result = result
+        job.status = 'succeeded' if result.get('status') == 'success' else 'failed'
+        job.finished_at = time.time()
+        self._journal(job)
+        self._release(job)
+        log.info(f"🏁 Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s")
+
+        self._notify(job)
+
+    def _journal(self, job):
+        if not self.journal:
+            return
+        if 'orders' in job.data:
+            # Batch orders are journalled one by one, so a repeat of any of
+            # them on its own is caught
+            results = [None] * len(job.orders)
+            if job.finished_at:
+                results = job.result.get('results') or [job.result] * len(job.orders)
+            for order, result in zip(job.orders, results):
+                key = order_key(order)
+                if not key:
+                    continue
+                status = job.status
+                if result is not None:
+                    status = 'succeeded' if result.get('status') == 'success' else 'failed'
+                self.journal.record(key, job.id, status, result)
+            return
+        key = order_key(job.data)
+        if key:
+            self.journal.record(key, job.id, job.status, job.result)
+
+    def _notify(self, job):
+        with self._lock:
+            watchers = list(job.watchers)
+        if 'orders' in job.data:
+            # Every order of a batch is answered in its own chat
+            results = job.result.get('results') or [job.result] * len(job.orders)
+            for order, result in zip(job.orders, results):
+                self._send(job, order.get('chat_id'), result)
+            by_key = {order_key(order): result for order, result in zip(job.orders, results)}
+        else:
+            self._send(job, job.data.get('chat_id'), job.result)
+            by_key = {}
+        # Chats that sent the same order while it was queued or running
+        for chat_id, order in watchers:
+            self._send(job, chat_id, by_key.get(order_key(order), job.result))
+
+    def _send(self, job, chat_id, result):
+        if not chat_id or not self.bot_url:
+            return
+        try:
+            response = requests.post(f"{self.bot_url}/send-message", json={
+                'chat_id': chat_id,
+                'job_id': job.id,
+                'message': format_result_message(result),
+                'reply_to_original': True,
+            }, timeout=CALLBACK_TIMEOUT)
+            response.raise_for_status()
+            log.info(f"📤 Sent result of job {job.id} to WhatsApp bot")
+        except Exception as e:
+            log.warning(f"⚠️ Could not send result of job {job.id} to WhatsApp bot: {e}")
@@ -0,0 +1,159 @@
+# Structured, non-blocking logging for the service and its worker processes
+# Every record is one JSON line carrying the job id, SO number and step it
+# was logged under, so the output of concurrent orders can be told apart
+# (and filtered with jq). Callers only put the record on a queue; a listener
+# thread formats and writes it, so a slow terminal or disk never holds up a
+# Selenium step.
+#
+#   log.info(f"✅ Clicked Commit button")             # always
+#   log.debug(f"   Option {i}: '{option_text}'")     # per option / per row detail
+#
+# AP_LOG_LEVEL is the lowest level written. At INFO (the default) the debug
+# lines of a sample of the orders (AP_LOG_DEBUG_SAMPLE) are written too,
+# with all of their detail; WARNING or ERROR leave out info lines as well.
+# AP_LOG_FORMAT=text gives one readable line per record instead of JSON.
+import atexit
+import copy
+import json
+import logging
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("AP_LOG_LEVEL", "INFO").upper()
+LEVEL = logging.getLevelName(LOG_LEVEL) if isinstance(logging.getLevelName(LOG_LEVEL), int) else logging.INFO
+LOG_FORMAT = os.environ.get("AP_LOG_FORMAT", "json")  # "json" or "text"
+LOG_FILE = os.environ.get("AP_LOG_FILE")  # stdout when unset
+DEBUG_SAMPLE = float(os.environ.get("AP_LOG_DEBUG_SAMPLE", "0.01"))  # share of orders logged in full
+QUEUE_SIZE = 10000  # records waiting to be written; more are dropped
+
+CONTEXT_FIELDS = ("job_id", "so_no", "step")
+
+_context = threading.local()
+
+
+@contextmanager
+def log_context(**fields):
+    # Adds fields (job_id, so_no, step, verbose) to every record this thread
+    # logs inside the block
+    previous = getattr(_context, "fields", {})
+    _context.fields = {**previous, **fields}
+    try:
+        yield
+    finally:
+        _context.fields = previous
+
+
+def current_context():
+    # For handing the context to another thread, e.g. a step graph worker
+    return dict(getattr(_context, "fields", {}))
+
+
+class _ContextFilter(logging.Filter):
+    # Runs on the calling thread: stamps the context and drops records below
+    # AP_LOG_LEVEL, except the debug lines of sampled orders at INFO
+    def filter(self, record):
+        fields = getattr(_context, "fields", {})
+        if record.levelno < LEVEL and not (fields.get("verbose") and LEVEL <= logging.INFO):
+            return False
+        record.context = {k: fields[k] for k in CONTEXT_FIELDS if fields.get(k) is not None}
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.forwarded = 0  # dropped in this process and already handed to the parent
+        self.merged = 0  # dropped in worker processes
+
+    def prepare(self, record):
+        # Only the message and traceback are rendered on the calling thread,
+        # the listener builds the line
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "pid": record.process,
+            **record.context,
+            "msg": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        context = " ".join(f"{k}={v}" for k, v in record.context.items())
+        line = f"[{context}] {record.getMessage()}" if context else record.getMessage()
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def _setup():
+    logger = logging.getLogger("autoplant")
+    logger.setLevel(logging.DEBUG)  # _ContextFilter decides what debug lines go through
+    logger.propagate = False
+
+    output = logging.FileHandler(LOG_FILE, encoding="utf-8") if LOG_FILE else logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+    handler = _DroppingQueueHandler(queue.Queue(maxsize=QUEUE_SIZE))
+    handler.addFilter(_ContextFilter())
+    logger.addHandler(handler)
+
+    listener = QueueListener(handler.queue, output)
+    listener.start()
+    stopped = threading.Event()
+
+    def _flush():
+        # Write out what is still queued; worker processes skip atexit
+        # handlers, so multiprocessing's finalizers call this there
+        if not stopped.is_set():
+            stopped.set()
+            listener.stop()
+    atexit.register(_flush)
+    multiprocessing.util.Finalize(None, _flush, exitpriority=0)
+    return logger, handler
+
+
+log, _handler = _setup()
+
+
+def dropped_records():
+    return _handler.dropped - _handler.forwarded + _handler.merged
+
+
+# Worker processes hand their count to the parent with every result, the
+# same way as their metrics
+def drain_dropped_records():
+    count = _handler.dropped - _handler.forwarded
+    _handler.forwarded += count
+    return count
+
+
+def merge_dropped_records(count):
+    _handler.merged += count
@@ -0,0 +1,194 @@
+# Local cache of the transporter's vehicles and drivers
+# Every autocomplete list the flows see (vehicle_noo, driverLicId) is
+# harvested into a JSON file shared by the worker processes, indexed by the
+# normalized vehicle number and by the last 4 digits of the driver license.
+# A placement can then type the single most selective search term and pick
+# the known option, instead of probing the driver name word by word.
+#
+# Entries expire after MASTER_DATA_TTL. When the endpoint map has the
+# optional "vehicle_master" / "driver_master" requests the HTTP engine also
+# refreshes the whole list in one go.
+import json
+import os
+import re
+import threading
+import time
+
+from log import log
+
+MASTER_DATA_FILE = os.environ.get("AP_MASTER_DATA_FILE", "master_data.json")
+MASTER_DATA_TTL = float(os.environ.get("AP_MASTER_DATA_TTL", str(6 * 60 * 60)))  # seconds
+
+
+def normalize_vehicle(vehicle_num):
+    # "mh 12 ab-1234" -> "MH12AB1234"
+    return re.sub(r"[^A-Z0-9]", "", str(vehicle_num or "").upper())
+
+
+def license_suffix(option_text):
+    # Driver options look like "NAME-LICENSE_NUMBER"; same rule as Step 15
+    if '-' not in option_text:
+        return None
+    license_full = option_text.split('-')[-1].strip()
+    return license_full[-4:] if len(license_full) >= 4 else None
+
+
+def name_words(option_text):
+    return option_text.rsplit('-', 1)[0].upper().split()
+
+
+class MasterDataCache:
+    def __init__(self, path=MASTER_DATA_FILE, ttl=MASTER_DATA_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.vehicles = {}  # normalized vehicle number -> [option text, last seen]
+        self.drivers = {}  # option text -> last seen
+        self._by_suffix = {}  # license suffix -> option texts in self.drivers
+        self.refreshed_at = 0
+        self._mtime = None
+        self._lock = threading.RLock()
+
+    def _reload(self):
+        # Pick up what other worker processes learnt since the last look
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._mtime = mtime
+        for key, (text, seen) in stored.get("vehicles", {}).items():
+            if seen > self.vehicles.get(key, [None, 0])[1]:
+                self.vehicles[key] = [text, seen]
+        for text, seen in stored.get("drivers", {}).items():
+            if seen > self.drivers.get(text, 0):
+                self._add_driver(text, seen)
+        self.refreshed_at = max(self.refreshed_at, stored.get("refreshed_at", 0))
+
+    def _save(self):
+        cutoff = time.time() - self.ttl
+        self.vehicles = {k: v for k, v in self.vehicles.items() if v[1] >= cutoff}
+        for text in [k for k, v in self.drivers.items() if v < cutoff]:
+            self._remove_driver(text)
+        tmp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"vehicles": self.vehicles, "drivers": self.drivers, "refreshed_at": self.refreshed_at}, f)
+        os.replace(tmp_file, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def _fresh(self, seen):
+        return time.time() - seen < self.ttl
+
+    def _add_driver(self, text, seen):
+        self.drivers[text] = seen
+        self._by_suffix.setdefault(license_suffix(text), set()).add(text)
+
+    def _remove_driver(self, text):
+        if self.drivers.pop(text, None) is None:
+            return False
+        options = self._by_suffix.get(license_suffix(text))
+        if options is not None:
+            options.discard(text)
+            if not options:
+                del self._by_suffix[license_suffix(text)]
+        return True
+
+    def learn_vehicles(self, option_texts):
+        now = time.time()
+        with self._lock:
+            self._reload()
+            new = False
+            for text in option_texts:
+                key = normalize_vehicle(text)
+                if not key:
+                    continue
+                new = new or key not in self.vehicles or not self._fresh(self.vehicles[key][1])
+                self.vehicles[key] = [text, now]
+            if new:
+                self._save()
+
+    def learn_drivers(self, option_texts):
+        now = time.time()
+        with self._lock:
+            self._reload()
+            new = False
+            for text in option_texts:
+                if not license_suffix(text):
+                    continue
+                new = new or not self._fresh(self.drivers.get(text, 0))
+                self._add_driver(text, now)
+            if new:
+                self._save()
+
+    def vehicle_option(self, vehicle_num):
+        # Options may carry more than the number itself, so fall back to the
+        # same "contains" rule Step 14 uses
+        key = normalize_vehicle(vehicle_num)
+        if not key:
+            return None
+        with self._lock:
+            self._reload()
+            entry = self.vehicles.get(key)
+            if entry is None:
+                entry = next((e for k, e in self.vehicles.items() if key in k), None)
+            return entry[0] if entry and self._fresh(entry[1]) else None
+
+    def driver_option(self, license_num, driver_name=None):
+        # The cached option for a license suffix; when several drivers share
+        # it, the one whose name shares the most words with driver_name
+        license_num = str(license_num or "")
+        with self._lock:
+            self._reload()
+            candidates = [t for t in self._by_suffix.get(license_num, ()) if self._fresh(self.drivers[t])]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        wanted = set(str(driver_name or "").upper().split())
+        scored = sorted(candidates, key=lambda t: len(wanted & set(name_words(t))), reverse=True)
+        if len(wanted & set(name_words(scored[0]))) > len(wanted & set(name_words(scored[1]))):
+            return scored[0]
+        return None
+
+    def driver_search_term(self, option_text):
+        # The name word that, typed in full, brings up the fewest other drivers
+        with self._lock:
+            known = [name_words(t) for t in self.drivers]
+        words = name_words(option_text)
+        if not words:
+            return None
+
+        def matches(word):
+            return sum(1 for other in known if any(w.startswith(word) for w in other))
+        return min(words, key=lambda w: (matches(w), -len(w)))
+
+    def forget_vehicle(self, option_text):
+        with self._lock:
+            if self.vehicles.pop(normalize_vehicle(option_text), None):
+                self._save()
+
+    def forget_driver(self, option_text):
+        with self._lock:
+            if self._remove_driver(option_text):
+                self._save()
+
+    def needs_refresh(self):
+        with self._lock:
+            self._reload()
+            return not self._fresh(self.refreshed_at)
+
+    def refresh(self, fetch_vehicles, fetch_drivers):
+        # Bulk reload from callables returning every vehicle / driver option
+        vehicles, drivers = fetch_vehicles(), fetch_drivers()
+        with self._lock:
+            self.refreshed_at = time.time()
+            self.learn_vehicles(vehicles)
+            self.learn_drivers(drivers)
+            self._save()
+        log.info(f"📇 Master data refreshed: {len(vehicles)} vehicles, {len(drivers)} drivers")
+
+
+MASTER_DATA = MasterDataCache()
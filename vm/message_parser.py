@@ -0,0 +1,207 @@
+# Order fields from WhatsApp messages, the same rules as commands/ap-kara.js
+# The bot parses one message at a time with dataPatterns,
+# extractDataFromMessage, extractDataByLines and extractDriverInfo. This is a
+# port of them with the patterns compiled once, so a day's backlog or
+# months of old messages can be parsed (and checked for what placement
+# would be missing) without going through the bot or the portal:
+#
+#   POST /parse          {"message": "...", "command": "ap kara\nRamesh Kumar 1234"}
+#   POST /parse-batch    the same objects as JSON lines, answered line by line
+#   python message_parser.py backlog.jsonl > parsed.jsonl
+#
+# "message" is the quoted order message, "command" the optional "ap kara"
+# reply with the driver's name and license. Keep the patterns in step with
+# ap-kara.js; re.ASCII gives \b and \d the meaning they have in JavaScript,
+# but would also limit \s to ASCII, so whitespace is spelled as JS_SPACE, the
+# characters JavaScript's \s matches (the no-break space WhatsApp copy-paste
+# leaves between "25" and "MT" among them).
+import argparse
+import json
+import re
+import sys
+import time
+
+JS_SPACE = r"[\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff]"
+
+DATA_PATTERNS = {
+    # Vehicle number: xx11xx1111 format (2 letters, 2 digits, 2 letters, 4 digits)
+    "vehicle_num": re.compile(r"\b[A-Za-z]{2}\d{1,2}[A-Za-z]{1,2}\d{3,4}\b", re.ASCII),
+    # SO Number: 10-digit number starting with 2200
+    "so_no": re.compile(r"\b2200\d{6}\b", re.ASCII),
+    # Phone Number: 10-digit number NOT starting with 2200
+    "phone_num": re.compile(r"\b(?!2200)\d{10}\b", re.ASCII),
+    # Weight: number followed by "MT"
+    "weight": re.compile(r"\b(\d+(?:\.\d+)?)" + JS_SPACE + r"*MT\b", re.ASCII | re.I),
+    # Destination: string before weight (number + MT) in the same line
+    "destination": re.compile(r"^(.*?)" + JS_SPACE + r"+\d+(?:\.\d+)?" + JS_SPACE + r"*MT\b", re.ASCII | re.I),
+    # Driver license last 4 digits
+    "driver_license": re.compile(r"\b\d{4}\b", re.ASCII),
+}
+VEHICLE_RE = DATA_PATTERNS["vehicle_num"]
+SO_RE = DATA_PATTERNS["so_no"]
+PHONE_RE = DATA_PATTERNS["phone_num"]
+WEIGHT_RE = DATA_PATTERNS["weight"]
+DESTINATION_RE = DATA_PATTERNS["destination"]
+LICENSE_RE = DATA_PATTERNS["driver_license"]
+
+# The payload fields sendToPython() posts to /process-data
+FIELDS = ("driver_name", "driver_license", "vehicle_num", "destination", "weight", "so_no", "phone_num")
+MESSAGE_FIELDS = ("vehicle_num", "destination", "weight", "so_no", "phone_num")
+# What placement cannot do without
+REQUIRED_FIELDS = ("so_no", "vehicle_num", "driver_name", "driver_license", "weight")
+
+
+def _empty():
+    return dict.fromkeys(("vehicle_num", "destination", "weight", "so_no", "phone_num",
+                          "driver_license", "driver_name"))
+
+
+def _first(pattern, text, group=0):
+    match = pattern.search(text)
+    return match.group(group) if match else None
+
+
+def _destination(line):
+    # Everything before the weight, without a leading vehicle number
+    match = DESTINATION_RE.match(line)
+    if not match:
+        return None
+    destination = match.group(1).strip()
+    vehicle = VEHICLE_RE.search(destination)
+    if vehicle:
+        destination = destination.replace(vehicle.group(0), "", 1).strip()
+    return destination
+
+
+def extract_data_from_message(text):
+    # extractDataFromMessage(): first match of each pattern in the whole text
+    if not text:
+        return None
+    result = _empty()
+    result["vehicle_num"] = _first(VEHICLE_RE, text)
+    result["phone_num"] = _first(PHONE_RE, text)
+    result["so_no"] = _first(SO_RE, text)
+    result["weight"] = _first(WEIGHT_RE, text, 1)
+    for line in text.split("\n"):
+        if WEIGHT_RE.search(line) and DESTINATION_RE.match(line):
+            result["destination"] = _destination(line)
+            break
+    return result
+
+
+def extract_data_by_lines(text):
+    # extractDataByLines(): first match of each pattern line by line. Its
+    # destination branch only runs while the weight is unset, which the line
+    # before it has just set, so ap-kara.js never gets a destination here.
+    result = _empty()
+    for line in (line.strip() for line in text.split("\n")):
+        if not line:
+            continue
+        for field, pattern in (("vehicle_num", VEHICLE_RE), ("phone_num", PHONE_RE), ("so_no", SO_RE)):
+            if not result[field]:
+                result[field] = _first(pattern, line)
+        if not result["weight"]:
+            result["weight"] = _first(WEIGHT_RE, line, 1)
+    return result
+
+
+def extract_driver_info(text):
+    # extractDriverInfo(): the line after "ap kara" is "<name> [-] <last 4 of
+    # license> [more order fields]"; lines after it may carry order fields too
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    result = {"driver_name": None, "driver_license": None, "additional_data": dict.fromkeys(MESSAGE_FIELDS)}
+    if len(lines) < 2:
+        return result
+
+    driver_line = lines[1]
+    license_match = LICENSE_RE.search(driver_line)
+    if license_match:
+        license_num = license_match.group(0)
+        result["driver_license"] = license_num
+        # indexOf(): the first occurrence of the digits, as the bot does
+        at = driver_line.index(license_num)
+        name = driver_line[:at].strip()
+        if name.endswith("-"):
+            name = name[:-1].strip()
+        if name:
+            result["driver_name"] = name
+
+        additional = driver_line[at + 4:].strip()
+        if len(lines) > 2:
+            additional += "\n" + "\n".join(lines[2:])
+        if additional.strip():
+            result["additional_data"] = extract_data_from_message(additional)
+    return result
+
+
+def parse_order(message, command=None):
+    # What handleApKaraCommand() sends to /process-data: the quoted message
+    # parsed both ways (pattern-based wins), then the driver and any order
+    # fields from an "ap kara" reply on top
+    pattern_based = extract_data_from_message(message) or _empty()
+    line_based = extract_data_by_lines(message or "")
+    data = {field: pattern_based[field] or line_based[field] or None for field in MESSAGE_FIELDS}
+    data["driver_license"] = data["driver_name"] = None
+
+    if command and command.lower().strip().startswith("ap kara"):
+        driver = extract_driver_info(command)
+        if driver["driver_name"] or driver["driver_license"]:
+            data["driver_name"] = driver["driver_name"]
+            data["driver_license"] = driver["driver_license"]
+            for field, value in (driver["additional_data"] or {}).items():
+                if value is not None:
+                    data[field] = value
+    return {field: data[field] for field in FIELDS}
+
+
+def missing_fields(data):
+    return [field for field in REQUIRED_FIELDS if not data.get(field)]
+
+
+def parse_entry(entry):
+    # One /parse request or backlog line -> the parsed order and what it lacks
+    if not isinstance(entry, dict) or not isinstance(entry.get("message"), str):
+        raise ValueError("Expected a JSON object with a 'message' string")
+    command = entry.get("command")
+    data = parse_order(entry["message"], command if isinstance(command, str) else None)
+    missing = missing_fields(data)
+    result = {"data": data, "missing": missing, "valid": not missing}
+    if entry.get("id") is not None:
+        result["id"] = entry["id"]
+    return result
+
+
+def parse_lines(lines):
+    # JSON lines in, one result per non-empty line out, in order; lines that
+    # are not valid entries come back with an error instead of stopping the run
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if not line.strip():
+            continue
+        try:
+            yield parse_entry(json.loads(line))
+        except ValueError as e:  # json.JSONDecodeError is one too
+            yield {"line": number, "error": str(e), "valid": False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse WhatsApp order messages the way ap-kara.js does")
+    parser.add_argument("backlog", nargs="?", help='JSON lines with "message" (and "command", "id"); stdin if omitted')
+    args = parser.parse_args()
+
+    source = open(args.backlog, encoding="utf-8") if args.backlog else sys.stdin
+    started = time.perf_counter()
+    total = valid = 0
+    with source:
+        for result in parse_lines(source):
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            total += 1
+            valid += result["valid"]
+    elapsed = time.perf_counter() - started
+    print(f"📊 {total} message(s) parsed in {elapsed:.2f}s, {valid} complete, {total - valid} missing fields or invalid",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# Timing spans and latency histograms for the placement flow
+# The flow calls mark_step("search"), mark_step("commit"), ... at each step
+# boundary; every span ends when the next one starts (or when the order
+# finishes) and lands in a histogram that /metrics exposes in the
+# Prometheus text format. Steps run by step_graph.py are timed one by one
+# with record_step(), as several of them can be running at once.
+#
+# Orders run in worker processes, so those processes only buffer their
+# observations (REGISTRY.forward = True) and hand them to the parent with each
+# result, where REGISTRY.merge() folds them into the served histograms.
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTE_BUCKETS = (10e3, 50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6)
+
+STEP_SECONDS = "ap_step_duration_seconds"
+ORDER_SECONDS = "ap_order_duration_seconds"
+OPERATION_SECONDS = "ap_operation_duration_seconds"
+STEP_BYTES = "ap_step_received_bytes"
+DOM_READY_SECONDS = "ap_page_dom_ready_seconds"
+
+HELP = {
+    STEP_SECONDS: "Duration of each portal step of an order placement",
+    ORDER_SECONDS: "End-to-end duration of an order placement",
+    OPERATION_SECONDS: "Duration of browser and login operations outside an order",
+    STEP_BYTES: "Bytes the browser received during each portal step (AP_MEASURE_NETWORK=1)",
+    DOM_READY_SECONDS: "Time until the DOM of a page a step navigated to was ready (AP_MEASURE_NETWORK=1)",
+}
+HISTOGRAM_BUCKETS = {STEP_BYTES: BYTE_BUCKETS}
+
+
+class Histogram:
+    def __init__(self, name, buckets=BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self.series = {}  # sorted label items -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, labels):
+        key = tuple(sorted(labels.items()))
+        series = self.series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {HELP.get(self.name, self.name)}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in key)
+            sep = "," if labels else ""
+            for i, bound in enumerate(self.buckets):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {series[i]}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[len(self.buckets)]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[len(self.buckets)]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.forward = False  # Worker processes buffer observations for the parent
+        self._histograms = {}
+        self._outbox = []
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            if self.forward:
+                self._outbox.append((name, value, labels))
+            else:
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = Histogram(name, HISTOGRAM_BUCKETS.get(name, BUCKETS))
+                histogram.observe(value, labels)
+
+    def drain(self):
+        with self._lock:
+            observations, self._outbox = self._outbox, []
+        return observations
+
+    def merge(self, observations):
+        for name, value, labels in observations:
+            self.observe(name, value, **labels)
+
+    def render(self, gauges=None):
+        with self._lock:
+            lines = []
+            for name in sorted(self._histograms):
+                lines.extend(self._histograms[name].render())
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_current = threading.local()
+
+
+def mark_step(step):
+    # Close the running span (if any) as successful and start the next one
+    now = time.perf_counter()
+    _close_step(now, "ok")
+    _current.step = step
+    _current.step_started = now
+
+
+def set_engine(engine):
+    _current.engine = engine
+
+
+def end_step(outcome="ok"):
+    # Close the running span without starting another one
+    _close_step(time.perf_counter(), outcome)
+
+
+def step_context():
+    # The running order's timings and engine, for steps timed on other threads
+    return {"timings": getattr(_current, "timings", None), "network": getattr(_current, "network", None),
+            "engine": getattr(_current, "engine", "selenium")}
+
+
+def record_step(step, elapsed, outcome="ok", context=None):
+    context = context or step_context()
+    timings = context["timings"]
+    if timings is not None:
+        timings[step] = round(timings.get(step, 0) + elapsed, 4)
+    REGISTRY.observe(STEP_SECONDS, elapsed, step=step, engine=context["engine"], outcome=outcome)
+
+
+def record_network(step, received, blocked, dom_ready, profile, context=None):
+    context = context or step_context()
+    network = context["network"]
+    if network is not None:
+        totals = network.setdefault(step, {"bytes": 0, "blocked": 0})
+        totals["bytes"] += received
+        totals["blocked"] += blocked
+        if dom_ready is not None:
+            totals["dom_ready"] = round(dom_ready, 4)
+    REGISTRY.observe(STEP_BYTES, received, step=step, block_profile=profile)
+    if dom_ready is not None:
+        REGISTRY.observe(DOM_READY_SECONDS, dom_ready, step=step, block_profile=profile)
+
+
+def _close_step(now, outcome):
+    step = getattr(_current, "step", None)
+    if step is None:
+        return
+    record_step(step, now - _current.step_started, outcome)
+    _current.step = None
+
+
+@contextmanager
+def order_timer(engine):
+    # Times one placement; the caller sets state["outcome"] to "ok" on success
+    # and finds the per-step durations in state["timings"] afterwards (and
+    # the bytes received per step in state["network"] when measured)
+    state = {"outcome": "error", "timings": {}, "network": {}}
+    _current.timings = state["timings"]
+    _current.network = state["network"]
+    _current.step = None
+    set_engine(engine)
+    started = time.perf_counter()
+    try:
+        yield state
+    finally:
+        now = time.perf_counter()
+        _close_step(now, state["outcome"])
+        REGISTRY.observe(ORDER_SECONDS, now - started, engine=getattr(_current, "engine", engine),
+                         outcome=state["outcome"])
+        state["timings"]["total"] = round(now - started, 4)
+        _current.timings = None
+        _current.network = None
+
+
+@contextmanager
+def timed(operation):
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        REGISTRY.observe(OPERATION_SECONDS, time.perf_counter() - started, operation=operation, outcome=outcome)
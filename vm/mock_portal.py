@@ -0,0 +1,435 @@
+# Local stand-in for the Autoplant portal (dfpcl.autoplant.in)
+# Serves the pages, element ids, JS alerts and .do endpoints the automation
+# relies on, with configurable latency and failure injection, so the flow can
+# be benchmarked and regression-tested on a machine with no network:
+#
+#   python mock_portal.py --port 8080 --latency 0.05 --error-rate 0.02
+#   AP_PORTAL_URL=http://127.0.0.1:8080/AutoplantVC/transporter_report.do?method=getTransporterReport&status=planned \
+#   AP_HTTP_ENDPOINTS=http_endpoints.example.json python ap_kara.py
+#
+# Any 10-digit SO starting with 2200 exists on first use with REM_QTY left.
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+
+from flask import Flask, request, session, redirect, jsonify
+
+REM_QTY = 40.0
+VEHICLE_CAPACITY = 35.0
+USERNAME = "606724"
+PASSWORD = "Test@1234"
+
+# Default master data: vehicle numbers and "NAME-LICENSE" drivers
+VEHICLES = [f"MH{12 + i % 30:02d}AB{1000 + i}" for i in range(40)]
+DRIVERS = [f"{first} {last}-MH12{20100000000 + i}"
+           for i, (first, last) in enumerate(
+               (f, l) for f in ("RAMESH", "SURESH", "MAHESH", "GANESH", "DINESH")
+               for l in ("KUMAR", "PATIL", "SHINDE", "YADAV"))]
+
+CONFIG = {
+    "latency": 0.0,  # seconds added to every request
+    "jitter": 0.0,  # +/- seconds of random extra latency
+    "error_rate": 0.0,  # share of data requests answered with HTTP 500
+    "refresh_popup_rate": 0.0,  # share of Place Vehicle clicks showing "Kindly refresh page once"
+    "session_ttl": 0,  # seconds before a login expires (0 = never)
+}
+
+app = Flask(__name__)
+app.secret_key = "mock-portal"
+app.config["SESSION_COOKIE_NAME"] = "JSESSIONID"
+
+_lock = threading.Lock()
+_sessions = {}  # session id -> login time
+_orders = {}  # row id (e.g. 2200478050_010_1) -> order
+_placements = []
+
+
+def _order_for(so_no):
+    # Caller holds _lock
+    row_id = f"{so_no}_010_1"
+    if row_id not in _orders:
+        _orders[row_id] = {"id": row_id, "so_no": so_no, "status": "planned", "rem_qty": REM_QTY}
+    return _orders[row_id]
+
+
+def _logged_in():
+    sid = session.get("sid")
+    with _lock:
+        started = _sessions.get(sid)
+    if started is None:
+        return False
+    if CONFIG["session_ttl"] and time.time() - started > CONFIG["session_ttl"]:
+        with _lock:
+            _sessions.pop(sid, None)
+        return False
+    return True
+
+
+def _inject_error():
+    return random.random() < CONFIG["error_rate"]
+
+
+@app.before_request
+def _add_latency():
+    if request.path.startswith("/mock/"):
+        return
+    delay = CONFIG["latency"] + random.uniform(-CONFIG["jitter"], CONFIG["jitter"])
+    if delay > 0:
+        time.sleep(delay)
+
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Autoplant VC - Login</title></head>
+<body>
+<form action="login.do" method="post">
+  <input type="text" name="username" placeholder="Username">
+  <input type="password" name="password" placeholder="Password">
+  <input type="submit" value="Login">
+</form>
+__ERROR__
+</body></html>"""
+
+REPORT_PAGE = """<!DOCTYPE html>
+<html><head><title>Autoplant VC - Transporter Report</title>
+<style>
+  .hidden { display: none; }
+  .autocomplete { position: relative; display: inline-block; }
+  .autocomplete-items div { cursor: pointer; padding: 2px; border-bottom: 1px solid #ddd; }
+</style>
+</head>
+<body>
+<a href="#" class="sidebar-toggle">&#9776;</a>
+<ul class="sidebar-menu">
+  <li><a href="#" id="vendorMenu">Vendor Collaboration</a>
+    <ul id="vendorSubmenu" class="hidden">
+      <li><a href="#" id="availableOrdersLink">Available Orders Report</a></li>
+    </ul>
+  </li>
+</ul>
+
+<div id="report" class="hidden">
+  <label><input type="radio" name="view" id="plannedOrders" value="planned" checked> Planned</label>
+  <label><input type="radio" name="view" id="totalOrders" value="total"> Total Orders</label>
+  <label><input type="radio" name="view" id="commit_allocated" value="commit_allocated"> Commit/Allocated</label>
+  <br>
+  <input type="text" id="jqgid_globalSearch" placeholder="Search">
+  <button type="button" id="commitBtnTOO">Commit</button>
+  <button type="button" id="placeVehicleBtn">Place Vehicle</button>
+  <div id="load_orderGrid" class="loading" style="display:none">Loading...</div>
+  <table id="orderGrid"><tbody></tbody></table>
+  <div id="placeVehicleContainer"></div>
+</div>
+
+<script>
+// Minimal stand-ins for what the automation checks on the real portal:
+// jQuery.active for AJAX idle and jqGrid's load_<grid> overlay.
+window.jQuery = {active: 0};
+var currentView = "planned";
+
+function api(method, params, body) {
+  var url = "transporter_report.do?method=" + method;
+  for (var key in params) { url += "&" + key + "=" + encodeURIComponent(params[key]); }
+  var options = {method: body ? "POST" : "GET", credentials: "same-origin"};
+  if (body) { options.body = new URLSearchParams(body); }
+  jQuery.active++;
+  return fetch(url, options).finally(function () { jQuery.active--; });
+}
+
+document.getElementById("vendorMenu").addEventListener("click", function (e) {
+  e.preventDefault();
+  document.getElementById("vendorSubmenu").classList.toggle("hidden");
+});
+document.getElementById("availableOrdersLink").addEventListener("click", function (e) {
+  e.preventDefault();
+  document.getElementById("report").classList.remove("hidden");
+  loadGrid("");
+});
+
+function loadGrid(search) {
+  var overlay = document.getElementById("load_orderGrid");
+  overlay.style.display = "block";
+  var status = currentView === "commit_allocated" ? "commit_allocated" : "planned";
+  return api("getTransporterReportData", {status: status}, {searchString: search, _search: "true"})
+    .then(function (r) { return r.ok ? r.json() : {rows: []}; })
+    .then(function (data) {
+      var body = document.querySelector("#orderGrid tbody");
+      body.innerHTML = "";
+      data.rows.forEach(function (row) {
+        var tr = document.createElement("tr");
+        tr.className = "jqgrow";
+        var input = status === "planned"
+          ? '<input type="checkbox" id="OrderNo_' + row.id + '">'
+          : '<input type="radio" name="SplitOrder" value="' + row.id + '">';
+        tr.innerHTML = "<td>" + input + "</td><td>" + row.cell.join("</td><td>") + "</td>";
+        body.appendChild(tr);
+      });
+    })
+    .finally(function () { overlay.style.display = "none"; });
+}
+
+document.getElementById("jqgid_globalSearch").addEventListener("keydown", function (e) {
+  if (e.key === "Enter") { loadGrid(this.value); }
+});
+["plannedOrders", "totalOrders", "commit_allocated"].forEach(function (id) {
+  document.getElementById(id).addEventListener("click", function () {
+    currentView = this.value;
+    document.getElementById("placeVehicleContainer").innerHTML = "";
+    loadGrid("");
+  });
+});
+
+function displayOrderNo(id) {
+  // 2200478050_010_1 is shown as 2200478050_010-1-1 in the confirmation
+  var parts = id.split("_");
+  return parts[0] + "_" + parts[1] + "-" + parts[2] + "-1";
+}
+
+document.getElementById("commitBtnTOO").addEventListener("click", function () {
+  var checked = Array.prototype.filter.call(
+    document.querySelectorAll("input[id^='OrderNo_']"), function (c) { return c.checked; });
+  if (!checked.length) { alert("Please select at least one order"); return; }
+  var ids = checked.map(function (c) { return c.id.substring("OrderNo_".length); });
+  var text = "Do you want to Commit these Order No's ??";
+  ids.forEach(function (id, i) { text += " " + (i + 1) + ". Order No : " + displayOrderNo(id); });
+  if (!confirm(text)) { return; }
+  api("commitOrders", {}, {orderNos: ids.join(",")})
+    .then(function (r) { return r.text(); })
+    .then(function (reply) { alert(reply); loadGrid(document.getElementById("jqgid_globalSearch").value); });
+});
+
+document.getElementById("placeVehicleBtn").addEventListener("click", function () {
+  var selected = document.querySelector("input[name='SplitOrder']:checked");
+  if (!selected) { alert("Please select an order"); return; }
+  api("placeVehicle", {orderNo: selected.value})
+    .then(function (r) { return r.text(); })
+    .then(function (html) {
+      if (html.toLowerCase().indexOf("kindly refresh page once") >= 0) { alert(html); return; }
+      document.getElementById("placeVehicleContainer").innerHTML = html;
+      initPlaceVehicleForm(selected.value);
+    });
+});
+
+function closeAllLists() {
+  document.querySelectorAll(".autocomplete-items").forEach(function (list) { list.remove(); });
+}
+document.addEventListener("click", closeAllLists);
+
+function autocomplete(field, method, onPick) {
+  field.addEventListener("input", function () {
+    var value = this.value;
+    closeAllLists();
+    if (!value) { return; }
+    var list = document.createElement("div");
+    list.setAttribute("id", this.id + "autocomplete-list");
+    list.setAttribute("class", "autocomplete-items");
+    this.parentNode.appendChild(list);
+    api(method, {term: value})
+      .then(function (r) { return r.json(); })
+      .then(function (items) {
+        items.forEach(function (item) {
+          var option = document.createElement("div");
+          option.innerHTML = "<strong>" + item.substr(0, value.length) + "</strong>" +
+            item.substr(value.length) + "<input type='hidden' value='" + item + "'>";
+          option.addEventListener("click", function () {
+            field.value = this.getElementsByTagName("input")[0].value;
+            closeAllLists();
+            if (onPick) { onPick(field.value); }
+          });
+          list.appendChild(option);
+        });
+      });
+  });
+}
+
+function initPlaceVehicleForm(orderId) {
+  autocomplete(document.getElementById("vehicle_noo"), "getVehicleList");
+  autocomplete(document.getElementById("driverLicId"), "getDriverList");
+  document.getElementById("placeVehicleSubmit").addEventListener("click", function () {
+    document.getElementById("lrDetails").classList.remove("hidden");
+  });
+  document.getElementById("sublitLRDetails").addEventListener("click", function () {
+    if (!confirm("Confirm to Allocate Vehicle For This Order")) { return; }
+    api("savePlaceVehicle", {}, {
+      orderNo: orderId,
+      vehicle_noo: document.getElementById("vehicle_noo").value,
+      driverLicId: document.getElementById("driverLicId").value,
+      mobile_no: document.getElementById("mobile_no").value,
+      qty: document.getElementById("qty").value
+    }).then(function () {
+      window.location = "transporter_report.do?method=getTransporterReport&status=planned";
+    });
+  });
+}
+</script>
+</body></html>"""
+
+PLACE_VEHICLE_FORM = """<div id="placeVehicleForm">
+  Remaining Qty: <span id="remQty">__REM_QTY__</span>
+  Remaining Vehicle CC: <span id="remVehCC">__REM_VEH_CC__</span><br>
+  <div class="autocomplete"><input type="text" id="vehicle_noo" autocomplete="off" placeholder="Vehicle No"></div>
+  <div class="autocomplete"><input type="text" id="driverLicId" autocomplete="off" placeholder="Driver"></div>
+  <input type="text" id="mobile_no" placeholder="Mobile">
+  <input type="text" id="qty" placeholder="Qty">
+  <input type="text" id="ETADateTime" placeholder="ETA">
+  <button type="button" id="placeVehicleSubmit">Submit</button>
+  <div id="lrDetails" class="hidden"><button type="button" id="sublitLRDetails">Submit LR Details</button></div>
+</div>"""
+
+
+@app.route("/AutoplantVC/login.do", methods=["POST"])
+def login():
+    if request.form.get("username") != USERNAME or request.form.get("password") != PASSWORD:
+        return LOGIN_PAGE.replace("__ERROR__", "<p class='error'>Invalid username or password</p>")
+    sid = uuid.uuid4().hex
+    with _lock:
+        _sessions[sid] = time.time()
+    session["sid"] = sid
+    return redirect("transporter_report.do?method=getTransporterReport&status=planned")
+
+
+@app.route("/AutoplantVC/transporter_report.do", methods=["GET", "POST"])
+def transporter_report():
+    if not _logged_in():
+        # The real portal answers every action with the login form once the session is gone
+        return LOGIN_PAGE.replace("__ERROR__", "")
+
+    method = request.args.get("method")
+    if method == "getTransporterReport":
+        return REPORT_PAGE
+    if _inject_error():
+        return "Internal Server Error", 500
+
+    if method == "getTransporterReportData":
+        status = request.args.get("status", "planned")
+        search = (request.values.get("searchString") or "").strip()
+        wanted = "planned" if status == "planned" else "committed"
+        with _lock:
+            if search.isdigit() and len(search) == 10 and search.startswith("2200"):
+                _order_for(search)
+            rows = [{"id": o["id"], "cell": [o["id"], o["so_no"], f"{o['rem_qty']:.1f}"]}
+                    for o in _orders.values()
+                    if o["status"] == wanted and (not search or search in o["id"])]
+        return jsonify({"page": 1, "total": 1, "records": len(rows), "rows": rows})
+
+    if method == "commitOrders":
+        replies = []
+        with _lock:
+            for order_id in filter(None, request.values.get("orderNos", "").split(",")):
+                order = _orders.get(order_id)
+                if order and order["status"] == "planned":
+                    order["status"] = "committed"
+                    replies.append(f"ORDER NO:{order_id}, MESSAGE: ORDER COMMIT SUCCESS")
+                else:
+                    replies.append(f"ORDER NO:{order_id}, MESSAGE: ORDER COMMIT FAILED")
+        return "\n".join(replies)
+
+    if method == "placeVehicle":
+        if random.random() < CONFIG["refresh_popup_rate"]:
+            return "Kindly refresh page once"
+        with _lock:
+            order = _orders.get(request.args.get("orderNo"))
+            if not order or order["status"] != "committed":
+                return "Order not found", 404
+            rem_qty = order["rem_qty"]
+        return (PLACE_VEHICLE_FORM.replace("__REM_QTY__", f"{rem_qty:.1f}")
+                .replace("__REM_VEH_CC__", f"{VEHICLE_CAPACITY:.1f}"))
+
+    if method == "getVehicleList":
+        term = request.args.get("term", "").upper()
+        return jsonify([v for v in VEHICLES if v.startswith(term)])
+
+    if method == "getDriverList":
+        term = request.args.get("term", "").upper()
+        return jsonify([d for d in DRIVERS if any(word.startswith(term) for word in d.split("-")[0].split())])
+
+    if method == "savePlaceVehicle":
+        form = request.values
+        with _lock:
+            order = _orders.get(form.get("orderNo"))
+            try:
+                qty = float(form.get("qty") or 0)
+            except ValueError:
+                qty = 0
+            if (not order or order["status"] != "committed" or form.get("vehicle_noo") not in VEHICLES
+                    or form.get("driverLicId") not in DRIVERS or not 0 < qty <= order["rem_qty"]):
+                return "Vehicle placement failed", 400
+            order["rem_qty"] -= qty
+            _placements.append({
+                "order_id": order["id"],
+                "vehicle_num": form.get("vehicle_noo"),
+                "driver": form.get("driverLicId"),
+                "mobile_no": form.get("mobile_no"),
+                "qty": qty,
+                "timestamp": time.time(),
+            })
+        return "Vehicle placed successfully"
+
+    return f"Unknown method {method}", 400
+
+
+# Helpers for benchmarks and tests, not part of the real portal
+@app.route("/mock/state", methods=["GET"])
+def mock_state():
+    with _lock:
+        return jsonify({"orders": list(_orders.values()), "placements": list(_placements), "config": CONFIG})
+
+
+@app.route("/mock/master-data", methods=["GET"])
+def mock_master_data():
+    return jsonify({"vehicles": VEHICLES, "drivers": DRIVERS})
+
+
+@app.route("/mock/orders", methods=["POST"])
+def mock_orders():
+    # Seed planned orders so they show up in the unfiltered Available Orders list
+    with _lock:
+        orders = [_order_for(str(so_no)) for so_no in (request.json or {}).get("so_numbers", [])]
+    return jsonify({"orders": orders})
+
+
+@app.route("/mock/config", methods=["POST"])
+def mock_config():
+    for key, value in (request.json or {}).items():
+        if key in CONFIG:
+            CONFIG[key] = float(value)
+    return jsonify(CONFIG)
+
+
+@app.route("/mock/reset", methods=["POST"])
+def mock_reset():
+    with _lock:
+        _orders.clear()
+        _placements.clear()
+        if (request.json or {}).get("expire_sessions"):
+            _sessions.clear()
+    return jsonify({"status": "ok"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Autoplant portal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of data requests failing with 500")
+    parser.add_argument("--refresh-popup-rate", type=float, default=0.0,
+                        help="share of Place Vehicle clicks showing the refresh popup")
+    parser.add_argument("--session-ttl", type=float, default=0, help="seconds before a login expires")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible failure injection")
+    args = parser.parse_args()
+
+    CONFIG.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                  refresh_popup_rate=args.refresh_popup_rate, session_ttl=args.session_ttl)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"🧪 Mock Autoplant portal on http://{args.host}:{args.port}/AutoplantVC/ "
+          f"({json.dumps(CONFIG)})")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# Lean network profile for the portal browsers
+# Chrome ignores --disable-images, so every portal page still pulled its
+# images, fonts and third-party scripts. A block profile (AP_BLOCK_PROFILE)
+# drops them with the DevTools Network.setBlockedURLs command and the blink
+# imagesEnabled setting, and pages are loaded with the "eager" strategy:
+# driver.get() returns once the DOM is parsed, the flows already wait for the
+# elements they need explicitly (waits.py).
+#
+#   off     load everything, as before
+#   lean    images, fonts, media and analytics / ad scripts (default)
+#   strict  lean plus stylesheets; only if the flows still find their
+#           elements, the portal hides some of them with CSS
+#
+# AP_BLOCKED_URLS adds comma separated patterns ("*" wildcards) to any
+# profile. With AP_MEASURE_NETWORK=1 chromedriver's performance log is read
+# after every step: bytes received, requests blocked and, for a step that
+# navigated, the time until the DOM was ready. Runs with blocking on and off
+# can then be compared with benchmark.py. The log belongs to the whole
+# browser, so with several tabs the numbers are only indicative.
+import json
+import os
+
+from log import log
+from metrics import record_network
+
+LEAN_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.svg", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp3", "*.mp4", "*.webm",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*",
+)
+BLOCK_PROFILES = {
+    "off": (),
+    "lean": LEAN_PATTERNS,
+    "strict": LEAN_PATTERNS + ("*.css",),
+}
+
+BLOCK_PROFILE = os.environ.get("AP_BLOCK_PROFILE", "lean")
+EXTRA_BLOCKED_URLS = tuple(p.strip() for p in os.environ.get("AP_BLOCKED_URLS", "").split(",") if p.strip())
+PAGE_LOAD_STRATEGY = os.environ.get("AP_PAGE_LOAD_STRATEGY", "eager")  # "normal", "eager" or "none"
+MEASURE_NETWORK = os.environ.get("AP_MEASURE_NETWORK", "0") == "1"
+
+
+def blocked_patterns(profile=BLOCK_PROFILE):
+    if profile not in BLOCK_PROFILES:
+        raise ValueError(f"Unknown AP_BLOCK_PROFILE '{profile}', expected one of {sorted(BLOCK_PROFILES)}")
+    return BLOCK_PROFILES[profile] + EXTRA_BLOCKED_URLS
+
+
+def add_network_options(options, profile=BLOCK_PROFILE):
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if profile != "off":
+        # Also covers CSS background images and data: URLs the patterns miss
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    if MEASURE_NETWORK:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def apply_network_profile(driver, profile=BLOCK_PROFILE):
+    # DevTools commands act on the current tab, so every new tab needs this too
+    patterns = blocked_patterns(profile)
+    if not patterns:
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def read_network_log(driver):
+    # Bytes received, requests blocked and DOM-ready time (None if the log
+    # has no complete navigation) since the last read. Reading the log does
+    # not touch the page, so it is safe while a portal alert is open.
+    received = blocked = 0
+    document_requested = dom_ready = None
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry["message"])["message"]
+        method, params = message.get("method"), message.get("params", {})
+        if method == "Network.loadingFinished":
+            received += params.get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            blocked += 1
+        elif method == "Network.requestWillBeSent" and params.get("type") == "Document":
+            document_requested = params.get("timestamp")
+        elif method == "Page.domContentEventFired" and document_requested is not None:
+            dom_ready = params.get("timestamp", document_requested) - document_requested
+    return received, blocked, dom_ready
+
+
+def measure_step(driver, step, context=None):
+    # Called after each step when AP_MEASURE_NETWORK=1; step None only empties
+    # the log, e.g. of what a parked browser loaded between orders
+    try:
+        received, blocked, dom_ready = read_network_log(driver)
+    except Exception as e:
+        log.warning(f"⚠️ Could not read the network log after step '{step}': {e}")
+        return
+    if step is not None:
+        record_network(step, received, blocked, dom_ready, BLOCK_PROFILE, context)
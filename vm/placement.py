@@ -0,0 +1,719 @@
+# Order placement flow on the Autoplant portal (Steps 6-20)
+# Runs on a pooled browser that is already logged in and sitting on the
+# Available Orders Report page, and returns the result as a plain dict.
+# The Selenium flow is declared step by step in PLACEMENT_STEPS and run by
+# step_graph.run_steps().
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, InvalidSessionIdException, NoSuchWindowException
+import os
+import random
+import time
+from urllib.parse import urlsplit
+
+from artifacts import ArtifactRecorder, CAPTURE_DOM
+from autocomplete import fetch_suggestions
+from checkpoints import CHECKPOINTS
+from log import DEBUG_SAMPLE, log, log_context
+from master_data import MASTER_DATA, license_suffix
+from metrics import mark_step, end_step, order_timer, set_engine, timed
+from portal import PORTAL_URL
+from portal_alerts import ALLOCATE_CONFIRM, COMMIT_CONFIRM, COMMIT_RESULT, REFRESH, parse_alert
+from portal_session import is_login_page
+from step_graph import Step, StepFailed, StepNotVerified, run_steps
+from waits import wait_for, wait_for_grid, wait_for_alert_or, ajax_idle, first_grid_row
+
+
+PLACEMENT_ENGINE = os.environ.get("AP_ENGINE", "selenium")  # "selenium" or "http"
+RESUME_ATTEMPTS = int(os.environ.get("AP_RESUME_ATTEMPTS", "1"))  # extra tries after a browser crash
+
+BROWSER_CRASH_MESSAGES = (
+    "chrome not reachable", "disconnected", "session deleted", "invalid session id",
+    "tab crashed", "target window already closed", "no such window",
+)
+
+
+def order_quantity(weight, rem_qty, rem_veh_cc):
+    # Qty to place: the smallest of weight, remaining qty and remaining vehicle
+    # capacity, rounded down. Only allowed when both remaining values are
+    # within 5 MT of the requested weight; returns None otherwise.
+    weight = float(weight)
+    weight_threshold = weight - 5
+    if rem_qty >= weight_threshold and rem_veh_cc >= weight_threshold:
+        return int(min(rem_qty, rem_veh_cc, weight))
+    return None
+
+
+def add_commit_results(results, reply):
+    # Adds the order ids of a parsed commit reply to results, {so: {'order_ids',
+    # 'committed'}}; orders of SOs outside results are ignored
+    for order in reply.orders:
+        result = results.get(order.so_no)
+        if result is None:
+            continue
+        result['order_ids'].append(order.order_id)
+        result['committed'] = result['committed'] or order.success
+
+def browser_crashed(error):
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException)):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in BROWSER_CRASH_MESSAGES)
+
+
+def place_order(data, pool, job_id=None):
+    # A sample of the orders logs its per-option detail too
+    with log_context(so_no=data.get('so_no'), verbose=random.random() < DEBUG_SAMPLE):
+        return _place_with_resume(data, pool, job_id)
+
+
+def _place_with_resume(data, pool, job_id=None):
+    for attempt in range(RESUME_ATTEMPTS + 1):
+        with order_timer(PLACEMENT_ENGINE) as timer:
+            result = _place_order(data, pool, job_id)
+            if result.get('status') == 'success':
+                timer["outcome"] = "ok"
+        result['timings'] = timer["timings"]
+        if timer["network"]:
+            result['network'] = timer["network"]
+        if not result.pop('retryable', False) or attempt == RESUME_ATTEMPTS:
+            return result
+        # Resumes from the checkpoint on a new browser session
+        log.info(f"🔁 Browser crashed while placing SO {data.get('so_no')}, resuming on a new session")
+
+
+def _place_order(data, pool, job_id=None):
+    if PLACEMENT_ENGINE == "http":
+        import requests
+        from http_engine import place_order_http, HttpEngineUnsupported, HttpEngineError
+
+        try:
+            place_order_http(data)
+            return {
+                'status': 'success',
+                'message': 'Data processed successfully',
+                'engine': 'http',
+                'processed_data': processed_data(data)
+            }
+        except HttpEngineError as e:
+            log.error(f"❌ HTTP engine: {e}")
+            return {'status': 'error', 'message': str(e), 'engine': 'http', 'processed_data': None}
+        except (HttpEngineUnsupported, requests.RequestException) as e:
+            # Whatever was already done (e.g. the commit) is skipped by the
+            # browser flow, which only commits orders still in Available Orders
+            log.warning(f"⚠️ HTTP engine could not place the order ({e}), falling back to Chrome")
+            end_step("timeout" if isinstance(e, requests.Timeout) else "error")
+            set_engine("selenium")
+
+    return place_order_selenium(data, pool, job_id)
+
+
+# Fills a plain input without moving focus, so it can run while an
+# autocomplete list is open in another field
+FILL_SCRIPT = """
+    var field = arguments[0];
+    field.value = arguments[1];
+    field.dispatchEvent(new Event('input', {bubbles: true}));
+    field.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+
+def processed_data(data):
+    return {
+        'driver_name': data.get('driver_name'),
+        'driver_license': data.get('driver_license'),
+        'vehicle_num': data.get('vehicle_num'),
+        'destination': data.get('destination'),
+        'weight': float(data.get('weight')),
+        'so_no': data.get('so_no'),
+        'phone_num': data.get('phone_num')
+    }
+
+
+class OrderRun:
+    # What the steps of one Selenium placement share
+    def __init__(self, data, driver, checkpoint, artifacts):
+        self.data = data
+        self.driver = driver
+        self.checkpoint = checkpoint
+        self.artifacts = artifacts
+        self.so_no = data.get('so_no')
+        self.vehicle_num = data.get('vehicle_num')
+        self.driver_name = data.get('driver_name')
+        self.license_num = data.get('driver_license')
+        self.weight = data.get('weight')
+        self.phone_number = data.get('phone_num')
+        self.search_results_found = False
+
+
+def _checkbox(run):
+    return (By.XPATH, f"//input[starts-with(@id, 'OrderNo_{run.so_no}_')]")
+
+
+def _split_order_radio(run):
+    return (By.XPATH, f"//input[@name='SplitOrder' and starts-with(@value, '{run.so_no}_')]")
+
+
+def _search_so(run, search_box, row_locator):
+    old_row = first_grid_row(run.driver)
+    search_box.clear()
+    search_box.send_keys(str(run.so_no))
+    search_box.send_keys(Keys.RETURN)
+    log.info("✅ SO number searched successfully")
+
+    # Wait for the grid to reload, then for search results to load (or for our row to show up)
+    try:
+        wait_for_grid(run.driver, row_locator, old_row=old_row)
+    except TimeoutException:
+        log.warning("⚠️ Search results still loading after 10s, checking anyway")
+
+
+def _already_committed(run):
+    if run.checkpoint.done("commit"):
+        # An earlier attempt already committed this SO (Steps 6-9)
+        log.info(f"⏭️ Resuming: SO {run.so_no} was already committed as {run.checkpoint.info.get('order_id')}, skipping steps 6-9")
+        return True
+    return False
+
+
+def _no_search_results(run):
+    return not run.search_results_found
+
+
+def search_available(run, search_box):
+    # Step 6: Search for SO number
+    _search_so(run, search_box, _checkbox(run))
+
+    log.debug(f"🔍 Checking if search results exist for SO_NO = {run.so_no}")
+    checkboxes = run.driver.find_elements(*_checkbox(run))
+    if checkboxes:
+        run.search_results_found = True
+        log.info(f"✅ Found {len(checkboxes)} search result(s) for SO_NO = {run.so_no}")
+    else:
+        log.info(f"ℹ️ No search results found for SO_NO = {run.so_no}")
+        # Also check for any table rows or data rows to be sure
+        data_rows = run.driver.find_elements(By.XPATH, "//tr[contains(@class, 'jqgrow')]")
+        if not data_rows:
+            log.info("ℹ️ No data rows found in the table - confirming no search results")
+        else:
+            log.warning(f"⚠️ Found {len(data_rows)} data rows but no matching SO_NO checkboxes")
+            run.search_results_found = any(str(run.so_no) in row.text for row in data_rows)
+
+    if run.search_results_found:
+        log.info("🔄 Search results found - proceeding with steps 7-9")
+    else:
+        log.info("⏭️ No search results found - skipping steps 7-9 and continuing from step 10")
+
+
+def select_order(run, checkbox):
+    # Step 7: Find and click checkbox
+    checkbox.click()
+    log.info(f"✅ Clicked checkbox with SO_NO = {run.so_no}")
+
+
+def click_commit(run, commit_btn):
+    # Step 8: Click the Commit button
+    commit_btn.click()
+    log.info("✅ Clicked Commit button by ID")
+
+
+def handle_commit_alerts(run, alert1):
+    # Step 9: Two-step confirmation. FIRST POP-UP lists the orders to commit:
+    # 'Do you want to Commit these Order No's ?? 1. Order No : 2200478050_010-1-1'
+    confirm = parse_alert(alert1.text)
+    log.info(f"📢 First Alert found: '{confirm.text}'")
+
+    listed = confirm.orders_for(run.so_no)
+    if listed:
+        log.info(f"✅ FIRST CONFIRMATION: SO number found in format: {listed[0].order_id}")
+    else:
+        log.warning(f"⚠️ WARNING: SO number {run.so_no} not found in first confirmation popup")
+
+    if confirm.kind != COMMIT_CONFIRM:
+        log.error("❌ First popup doesn't appear to be a confirmation dialog")
+    elif not listed:
+        log.warning("⚠️ First popup is confirmation dialog but SO number verification unclear")
+    alert1.accept()  # Click OK
+    log.info("✅ First confirmation popup accepted")
+
+    # SECOND POP-UP: "ORDER NO:2200478050_010_1, MESSAGE: ORDER COMMIT SUCCESS"
+    log.info("⏳ Waiting for second success popup...")
+    try:
+        alert2 = wait_for(run.driver, EC.alert_is_present())
+        reply = parse_alert(alert2.text)
+        log.info(f"📢 Second Alert found: '{reply.text}'")
+
+        committed = reply.committed(run.so_no)
+        if committed:
+            log.info("🎉 COMMIT OPERATION SUCCESSFUL!")
+            log.debug(f"   ✓ SO Number Verified: {committed}")
+            log.debug(f"   ✓ Full Message: {reply.text}")
+            success_record = {
+                "so_number": run.so_no,
+                "extracted_so": committed,
+                "success_message": reply.text,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "status": "SUCCESS"
+            }
+            log.debug(f"📋 Success Record: {success_record}")
+            run.checkpoint.complete("commit", order_id=committed)
+        elif reply.kind == COMMIT_RESULT and any(order.success for order in reply.orders):
+            log.warning("⚠️ SUCCESS MESSAGE found but SO number verification unclear")
+            log.debug(f"   Expected SO: {run.so_no}")
+            log.debug(f"   Message: {reply.text}")
+        else:
+            log.error("❌ Second popup doesn't contain expected success message")
+            log.info(f"   Expected: MESSAGE: ORDER COMMIT SUCCESS with SO {run.so_no}")
+            log.info(f"   Actual: {reply.text}")
+
+        alert2.accept()  # Click OK on success popup
+        log.info("✅ Second popup dismissed")
+        return reply
+    except Exception:
+        # No second popup; Step 12 finds out whether the commit went through
+        log.error("❌ Error handling second popup after committing")
+
+
+def _commit_not_refused(run, reply):
+    # Only a reply listing this SO as not committed fails the step; without a
+    # reply, or when it does not mention the SO, Step 12 finds out
+    return not (reply and reply.orders_for(run.so_no) and not reply.committed(run.so_no))
+
+
+def click_radio(label):
+    def _action(run, radio):
+        radio.click()
+        log.info(f"✅ Clicked {label} radio button")
+    return _action
+
+
+def search_committed(run, search_box):
+    # Step 6 (again): Search for SO number in Commit/Allocated orders
+    _search_so(run, search_box, _split_order_radio(run))
+
+
+def select_split_order(run, split_order_radio):
+    # Step 12: Click on SplitOrder radio button with SO_NO in value
+    radio_value = split_order_radio.get_attribute("value")
+    log.debug(f"✅ Found radio button with value: {radio_value}")
+    if not (radio_value and radio_value.startswith(str(run.so_no))):
+        raise Exception(f"Radio button value doesn't start with SO_NO {run.so_no}")
+    split_order_radio.click()
+    log.info(f"✅ Step 12: Clicked SplitOrder radio button with SO_NO {run.so_no}")
+
+
+def click_place_vehicle(run, place_vehicle_btn):
+    # Step 13: Click on Place Vehicle button
+    place_vehicle_btn.click()
+    log.info("✅ Step 13: Clicked Place Vehicle button")
+
+
+def handle_refresh_popup(run, ready):
+    # Either the popup opens or the vehicle form becomes usable
+    alert = wait_for_alert_or(run.driver, (By.ID, "vehicle_noo"), timeout=5)
+    if alert is None:
+        log.info("ℹ️ No refresh popup found - continuing with code")
+        return
+    popup = parse_alert(alert.text)
+    log.info(f"📱 Alert found: '{popup.text}'")
+    alert.accept()  # Click OK
+    if popup.kind != REFRESH:
+        log.warning(f"⚠️ Found popup but not the expected refresh message: '{popup.text}'")
+        return
+
+    log.info("✅ Clicked OK on 'kindly refresh page once' popup")
+    log.info("🔍 Step 13 (AGAIN): Looking for Place Vehicle button...")
+    wait_for(run.driver, EC.element_to_be_clickable((By.ID, "placeVehicleBtn"))).click()
+    log.info("✅ Step 13: Clicked Place Vehicle button")
+
+
+def select_vehicle(run, vehicle_input):
+    # Step 14: vehicle number, picked from the autocomplete dropdown only
+    vehicle_num_str = str(run.vehicle_num)
+    first_three = vehicle_num_str[:3]
+    log.debug(f"   Vehicle number: '{vehicle_num_str}', First 3 characters: '{first_three}'")
+
+    # A cached option lets us type the whole vehicle number, which narrows the
+    # list down to that one vehicle
+    cached_option = MASTER_DATA.vehicle_option(vehicle_num_str)
+    search_terms = [first_three]
+    if cached_option:
+        log.debug(f"   Known vehicle option: '{cached_option}'")
+        search_terms.insert(0, vehicle_num_str)
+
+    for search_text in search_terms:
+        # Enter the search text in one go and wait for the suggestions
+        log.debug(f"   Entering: '{search_text}'")
+        dropdown_options = fetch_suggestions(run.driver, vehicle_input, search_text)
+        option_texts = [option.text.strip() for option in dropdown_options]
+        MASTER_DATA.learn_vehicles(option_texts)
+        log.debug(f"   Final result: Found {len(dropdown_options)} dropdown options")
+
+        for i, (option, option_text) in enumerate(zip(dropdown_options, option_texts)):
+            log.debug(f"   Option {i+1}: '{option_text}'")
+            if vehicle_num_str in option_text:
+                log.info(f"   ✅ Found match! Selected option: '{option_text}'")
+                run.driver.execute_script("arguments[0].click();", option)
+                log.info(f"✅ Step 14 completed: Final vehicle value: '{vehicle_input.get_attribute('value')}'")
+                return option_text
+
+        if search_text != first_three:
+            # The cached option is gone from the portal
+            MASTER_DATA.forget_vehicle(cached_option)
+
+    raise Exception(f"No matching vehicle number '{vehicle_num_str}' found in dropdown options")
+
+
+def select_driver(run, driver_input):
+    # Step 15: driver, auto-filled by the portal or picked from the dropdown by
+    # the last 4 digits of the license
+    license_num_str = str(run.license_num)
+    is_readonly = driver_input.get_attribute("readonly")
+    current_value = driver_input.get_attribute("value")
+    if is_readonly is not None and current_value:
+        log.info(f"✅ Step 15: Driver field is auto-filled with: '{current_value}'")
+        if license_num_str not in current_value:
+            log.warning(f"⚠️ Auto-filled driver '{current_value}' doesn't contain LICENSE_NUM '{license_num_str}', using it anyway")
+        return current_value
+
+    log.info("   Driver field is not auto-filled, proceeding with manual selection...")
+    driver_input = wait_for(run.driver, EC.element_to_be_clickable((By.ID, "driverLicId")))
+
+    # First 3 letters of each word in DRIVER_NAME, preceded by the most
+    # selective word of the cached option when we know it
+    search_terms = [(word, word[:3].upper()) for word in str(run.driver_name or '').strip().split()]
+    cached_option = MASTER_DATA.driver_option(run.license_num, run.driver_name)
+    cached_term = MASTER_DATA.driver_search_term(cached_option) if cached_option else None
+    if cached_term:
+        log.debug(f"   Known driver option: '{cached_option}', searching '{cached_term}'")
+        search_terms.insert(0, (cached_term, cached_term))
+
+    for word_index, (word, search_text) in enumerate(search_terms):
+        log.debug(f"   Trying word {word_index + 1}: '{word}', entering '{search_text}'")
+        try:
+            dropdown_options = fetch_suggestions(run.driver, driver_input, search_text)
+        except Exception:
+            log.debug("   Error looking for autocomplete dropdown")
+            continue
+        option_texts = [option.text.strip() for option in dropdown_options]
+        MASTER_DATA.learn_drivers(option_texts)
+        log.debug(f"   Final result: Found {len(dropdown_options)} dropdown options")
+
+        # Options look like "NAME-LICENSE_NUMBER"; match the last 4 digits exactly
+        for i, (option, option_text) in enumerate(zip(dropdown_options, option_texts)):
+            log.debug(f"   Option {i+1}: '{option_text}'")
+            if license_suffix(option_text) == license_num_str:
+                log.info(f"   ✅ Found exact match! Selected option: '{option_text}'")
+                run.driver.execute_script("arguments[0].click();", option)
+                log.info(f"✅ Step 15 completed: Final driver value: '{driver_input.get_attribute('value')}'")
+                return option_text
+
+        log.debug(f"   No matching LICENSE_NUM found for word '{word}'")
+        if cached_term and word_index == 0:
+            # The cached option is gone from the portal
+            MASTER_DATA.forget_driver(cached_option)
+
+    raise Exception(f"Driver with LICENSE_NUM {run.license_num} not found in dropdown")
+
+
+def fill_mobile(run, mobile_input):
+    # Step 16: mobile number, unless the portal auto-filled it
+    current_value = mobile_input.get_attribute("value")
+    if mobile_input.get_attribute("readonly") is not None and current_value:
+        log.info(f"✅ Step 16: Using auto-filled mobile number: '{current_value}'")
+        return
+    run.driver.execute_script(FILL_SCRIPT, mobile_input, str(run.phone_number))
+    log.info(f"✅ Step 16: Entered mobile number: {run.phone_number}")
+
+
+def fill_qty(run, qty_input):
+    # Step 17: quantity, only when the remaining qty and vehicle capacity allow it
+    weight = float(run.weight)
+    rem_veh_cc = float(run.driver.find_element(By.ID, "remVehCC").text)
+    rem_qty = float(run.driver.find_element(By.ID, "remQty").text)
+    log.debug(f"Remaining Vehicle CC: {rem_veh_cc}, Remaining Qty: {rem_qty}")
+
+    input_value = order_quantity(weight, rem_qty, rem_veh_cc)
+    if input_value is None:
+        weight_threshold = weight - 5
+        log.error(f"❌ Condition not met:")
+        log.debug(f"   rem_qty ({rem_qty}) >= {weight_threshold}: {rem_qty >= weight_threshold}")
+        log.debug(f"   rem_veh_cc ({rem_veh_cc}) >= {weight_threshold}: {rem_veh_cc >= weight_threshold}")
+        raise Exception("Step 17 failed: Insufficient remaining quantity or vehicle CC")
+
+    run.driver.execute_script(FILL_SCRIPT, qty_input, str(input_value))
+    log.info(f"✅ Step 17: Entered Qty: {input_value}")
+    return input_value
+
+
+def click_eta(run, eta):
+    eta.click()
+    log.info("✅ Clicked ETA button")
+    # Click on the body element to remove focus from ETA
+    run.driver.find_element(By.TAG_NAME, "body").click()
+    log.info("✅ Clicked body to remove focus from ETA")
+
+
+def capture_details(run, ready):
+    # The filled Place Vehicle form, for a sample of the orders
+    run.artifacts.capture(run.driver, "details")
+
+
+def click_button(label):
+    def _action(run, button):
+        button.click()
+        log.info(f"✅ Clicked {label}")
+    return _action
+
+
+def accept_allocation(run, alert):
+    # Step 20: "Confirm to Allocate Vehicle For This Order"
+    popup = parse_alert(alert.text)
+    log.info(f"📱 Alert found: '{popup.text}'")
+    alert.accept()  # Click OK
+    if popup.kind == ALLOCATE_CONFIRM:
+        log.info("✅ Clicked OK on confirmation popup")
+        run.checkpoint.complete("confirm")
+    else:
+        log.warning(f"⚠️ Unexpected alert message, clicked OK anyway: '{popup.text}'")
+
+
+def finish(run, ready):
+    # Final status check, once the allocation request has gone through
+    try:
+        wait_for(run.driver, ajax_idle(), timeout=5)
+    except Exception:
+        log.warning("⚠️ Portal still busy after confirming, reading URL anyway")
+    final_url = run.driver.current_url
+    log.info(f"🔎 Final URL: {final_url}")
+    return final_url
+
+
+def _vehicle_selected(run, option_text):
+    return str(run.vehicle_num) in (run.driver.find_element(By.ID, "vehicle_noo").get_attribute("value") or "")
+
+
+def _still_on_portal(run, final_url):
+    # Bounced to the login page or off the portal: the allocation may not
+    # have been saved
+    return urlsplit(final_url).netloc == urlsplit(PORTAL_URL).netloc and not is_login_page(run.driver)
+
+
+def clickable(locator):
+    return lambda run: EC.element_to_be_clickable(locator(run) if callable(locator) else locator)
+
+
+def present(locator):
+    return lambda run: EC.presence_of_element_located(locator)
+
+
+def alert_present(run):
+    return EC.alert_is_present()
+
+
+# Steps 6-20. Steps 1-5 (login, Available Orders Report) were done when the
+# pooled session was warmed up. Qty only needs the vehicle, so it is filled
+# while the driver autocomplete resolves. The mobile number waits for the
+# driver: choosing one may make the portal fill it in.
+PLACEMENT_STEPS = [
+    Step("search", search_available, wait=present((By.ID, "jqgid_globalSearch")),
+         skip=_already_committed, retries=1),
+    Step("select_order", select_order, wait=clickable(_checkbox), after=["search"], skip=_no_search_results,
+         error=lambda run, e: f"Could not find checkbox for SO_NO = {run.so_no}"),
+    Step("commit", click_commit, wait=clickable((By.ID, "commitBtnTOO")), after=["select_order"],
+         skip=_no_search_results, error="Could not find or click the Commit button"),
+    Step("commit_alerts", handle_commit_alerts, wait=alert_present, verify=_commit_not_refused, after=["commit"],
+         skip=_no_search_results,
+         error=lambda run, e: (f"❌ Portal did not commit SO {run.so_no}" if isinstance(e, StepNotVerified)
+                               else "❌ Error handling first popup after committing")),
+    # Steps 10-11: Total Orders, then Commit/Allocated orders
+    Step("total_orders", click_radio("totalOrders"), wait=clickable((By.ID, "totalOrders")),
+         after=["commit_alerts"], error="❌ Could not go to TOTAL ORDERS page"),
+    Step("open_committed_orders", click_radio("commit_allocated"), wait=clickable((By.ID, "commit_allocated")),
+         after=["total_orders"], error="❌ Could not go to COMMIT/ALLOCATED ORDERS page"),
+    Step("search_committed", search_committed, wait=present((By.ID, "jqgid_globalSearch")),
+         after=["open_committed_orders"], retries=1),
+    Step("split_order", select_split_order, wait=clickable(_split_order_radio), after=["search_committed"],
+         retries=1, error=lambda run, e: f"❌ Failed: S.O. number {run.so_no} not found"),
+    Step("place_vehicle", click_place_vehicle, wait=clickable((By.ID, "placeVehicleBtn")),
+         after=["split_order"], error="❌ Could not find or click Place Vehicle button"),
+    Step("refresh_popup", handle_refresh_popup, after=["place_vehicle"],
+         error="❌ Could not find or click Place Vehicle button by ID after refresh popup"),
+    Step("vehicle", select_vehicle, wait=clickable((By.ID, "vehicle_noo")), verify=_vehicle_selected,
+         after=["refresh_popup"],
+         error=lambda run, e: f"❌ Vehicle number '{run.vehicle_num}' not found in the dropdown list or input field not accessible"),
+    Step("driver", select_driver, wait=present((By.ID, "driverLicId")), after=["vehicle"],
+         error="❌ Could not find driver"),
+    Step("mobile", fill_mobile, wait=present((By.ID, "mobile_no")), after=["driver"],
+         error="❌ Could not find or input mobile number"),
+    Step("qty", fill_qty, wait=clickable((By.ID, "qty")), after=["vehicle"],
+         error="❌ Could not input quantity"),
+    Step("eta", click_eta, wait=clickable((By.ID, "ETADateTime")), after=["mobile", "qty"],
+         optional=True),
+    Step("details_screenshot", capture_details, after=["eta"], optional=True),
+    # Steps 18-19: submit the vehicle, then the LR details
+    Step("submit", click_button("1st submit button"), wait=clickable((By.ID, "placeVehicleSubmit")),
+         after=["details_screenshot"], error="❌ Could not find or click 1st submit button for placing vehicle"),
+    Step("submit_lr_details", click_button("2nd submit button"), wait=clickable((By.ID, "sublitLRDetails")),
+         after=["submit"], error="❌ Could not find or click 2nd submit button for placing vehicle"),
+    Step("confirm", accept_allocation, wait=alert_present, wait_timeout=7, after=["submit_lr_details"],
+         error="❌ Could not handle final confirmation popup"),
+    Step("finish", finish, verify=_still_on_portal, after=["confirm"],
+         error="❌ Portal left the order page after confirming, check whether the vehicle was placed"),
+]
+
+
+def place_order_selenium(data, pool, job_id=None):
+    log.info(f"Received data: {data}")
+
+    # Steps an earlier attempt at this order already did on the portal
+    checkpoint = CHECKPOINTS.load(data)
+    if checkpoint.done("confirm"):
+        log.info(f"⏭️ Resuming: SO {data.get('so_no')} was already allocated to {data.get('vehicle_num')}, nothing left to do")
+        checkpoint.clear()
+        return {'status': 'success', 'message': 'Data processed successfully', 'processed_data': processed_data(data)}
+
+    artifacts = ArtifactRecorder(data.get('so_no'), job_id)
+    session = None
+    try:
+        mark_step("checkout")
+        session = pool.checkout()
+        end_step()
+        log.info(f"✅ Using warm Chrome session on port {session.debug_port} (use #{session.uses})")
+
+        run_steps(PLACEMENT_STEPS, OrderRun(data, session.driver, checkpoint, artifacts))
+        log.info("🏁 All steps completed successfully")
+        checkpoint.clear()
+        return {'status': 'success', 'message': 'Data processed successfully', 'processed_data': processed_data(data)}
+
+    except Exception as e:
+        checkpoint.fail(str(e))
+        if not isinstance(e, StepFailed):
+            log.exception(f"❌ Error: {str(e)}")
+        crashed = browser_crashed(e.__cause__ or e)
+        if session is not None and not crashed:
+            artifacts.capture(session.driver, "error", failure=True, dom=CAPTURE_DOM)
+        result = {
+            'status': 'error',
+            'message': str(e),
+            'processed_data': None,
+            # A crashed browser is worth one more try on a new session
+            'retryable': crashed
+        }
+        if artifacts.path:
+            result['artifacts'] = artifacts.path
+        return result
+    finally:
+        # Hand the browser back to the pool, it is health checked before reuse
+        if session is not None:
+            pool.checkin(session)
+
+
+def commit_orders_batch(driver, so_numbers):
+    # Steps 6-9 for several SOs in one pass: list the Available Orders, tick
+    # every OrderNo_<SO>_ checkbox and click Commit once. Returns
+    # {so_no: {'order_ids': [...], 'committed': bool}}; SOs that are not in
+    # the list are left for their own placement to search and commit.
+    results = {so: {'order_ids': [], 'committed': False} for so in so_numbers}
+
+    search_box = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "jqgid_globalSearch"))
+    )
+    old_row = first_grid_row(driver)
+    search_box.clear()
+    search_box.send_keys(Keys.RETURN)
+    try:
+        wait_for_grid(driver, old_row=old_row)
+    except TimeoutException:
+        log.warning("⚠️ Available Orders still loading after 10s, checking anyway")
+
+    ticked = 0
+    for so in so_numbers:
+        for checkbox in driver.find_elements(By.XPATH, f"//input[starts-with(@id, 'OrderNo_{so}_')]"):
+            if not checkbox.is_selected():
+                checkbox.click()
+            ticked += 1
+    log.info(f"✅ Ticked {ticked} order(s) for {len(so_numbers)} SO number(s)")
+    if not ticked:
+        return results
+
+    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "commitBtnTOO"))).click()
+
+    # FIRST POP-UP: confirmation listing every checked order
+    WebDriverWait(driver, 10).until(EC.alert_is_present())
+    alert1 = driver.switch_to.alert
+    confirm = parse_alert(alert1.text)
+    log.info(f"📢 First Alert found: '{confirm.text}'")
+    unexpected = [order.order_id for order in confirm.orders if order.so_no not in results]
+    if unexpected:
+        alert1.dismiss()
+        raise Exception(f"Commit confirmation lists orders outside this batch: {', '.join(unexpected)}")
+    alert1.accept()
+
+    # SECOND POP-UP: one result line per order
+    WebDriverWait(driver, 10).until(EC.alert_is_present())
+    alert2 = driver.switch_to.alert
+    reply = parse_alert(alert2.text)
+    log.info(f"📢 Second Alert found: '{reply.text}'")
+    alert2.accept()
+
+    add_commit_results(results, reply)
+    for so, result in results.items():
+        if result['committed']:
+            log.info(f"   ✅ SO {so}: {result['order_ids']}")
+        else:
+            log.warning(f"   ❌ SO {so}: {result['order_ids'] or 'not committed'}")
+    return results
+
+
+def _commit_batch(so_numbers, pool):
+    if PLACEMENT_ENGINE == "http":
+        import requests
+        from http_engine import commit_orders_batch_http, HttpEngineUnsupported
+
+        try:
+            return commit_orders_batch_http(so_numbers)
+        except (HttpEngineUnsupported, requests.RequestException) as e:
+            log.warning(f"⚠️ HTTP engine could not commit the batch ({e}), using Chrome")
+
+    session = pool.checkout()
+    try:
+        return commit_orders_batch(session.driver, so_numbers)
+    finally:
+        pool.checkin(session)
+
+
+def place_batch(orders, pool, job_id=None):
+    # Several orders from one /process-data call: a single commit for all of
+    # them, then Steps 10-20 order by order (their own search finds nothing
+    # left to commit and goes straight to Step 10)
+    so_numbers = list(dict.fromkeys(str(o.get('so_no')) for o in orders if o.get('so_no')))
+    log.info(f"📦 Placing a batch of {len(orders)} order(s) for SO numbers {', '.join(so_numbers)}")
+
+    commits = {}
+    try:
+        with timed("batch_commit"):
+            commits = _commit_batch(so_numbers, pool)
+    except Exception as e:
+        log.warning(f"⚠️ Batch commit failed, orders will be committed one by one: {e}", exc_info=True)
+
+    for order in orders:
+        commit = commits.get(str(order.get('so_no')))
+        if commit and commit['committed']:
+            CHECKPOINTS.load(order).complete("commit", order_id=commit['order_ids'][0])
+
+    results = []
+    for order in orders:
+        result = place_order(order, pool, job_id)
+        result['commit'] = commits.get(str(order.get('so_no')))
+        results.append(result)
+
+    placed = sum(1 for r in results if r.get('status') == 'success')
+    return {
+        'status': 'success' if placed == len(results) else 'error',
+        'message': f"{placed} of {len(results)} orders placed",
+        'results': results,
+        'processed_data': None
+    }
@@ -0,0 +1,94 @@
+# Autoplant portal navigation shared by the Flask service and the browser pool
+# Covers the login (Steps 1-3) and the menu clicks that land on the
+# Available Orders Report page (Steps 4-5).
+import os
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from log import log
+
+# AP_PORTAL_URL points the automation at another portal, e.g. vm/mock_portal.py
+PORTAL_URL = os.environ.get(
+    "AP_PORTAL_URL",
+    "https://dfpcl.autoplant.in/AutoplantVC/transporter_report.do?method=getTransporterReport&status=planned"
+)
+USERNAME = "606724"
+PASSWORD = "Test@1234"
+
+
+def login(driver):
+    # Step 1: Open login page
+    log.info("🌐 Opening login page...")
+    try:
+        driver.get(PORTAL_URL)
+        log.info("🌐 Opened login page")
+
+    except Exception as e:
+        ERROR_MESSAGE = f"❌ Could not open login page"
+        log.error(ERROR_MESSAGE)
+        raise Exception(ERROR_MESSAGE)
+
+    # Step 2: Log in
+    log.info("🔐 Logging in...")
+    try:
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "username")))
+        driver.find_element(By.NAME, "username").send_keys(USERNAME)
+        driver.find_element(By.NAME, "password").send_keys(PASSWORD + Keys.RETURN)
+        log.info("🔐 Login submitted")
+
+    except Exception as e:
+        ERROR_MESSAGE = f"❌ Could not log in, Wrong Username or Password"
+        log.error(ERROR_MESSAGE)
+        raise Exception(ERROR_MESSAGE)
+
+    # Step 3: Wait until sidebar toggle appears
+    try:
+        toggle = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "sidebar-toggle"))
+        )
+
+        # Scroll into view and click via JS
+        driver.execute_script("arguments[0].scrollIntoView(true);", toggle)
+        log.info("📂 Sidebar toggle clicked via JS")
+
+    except Exception as e:
+        ERROR_MESSAGE = f"❌ Could not find sidebar toggle (Username or password might be wrong)"
+        log.error(ERROR_MESSAGE)
+        raise Exception(ERROR_MESSAGE)
+
+
+def open_available_orders_report(driver):
+    # Step 4: Click 'Vendor Collaboration'
+    try:
+        dropdown = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.LINK_TEXT, "Vendor Collaboration"))
+        )
+        dropdown.click()
+        log.info("✅ Clicked 'Vendor Collaboration'")
+
+    except Exception as e:
+        ERROR_MESSAGE = f"❌ Could not click 'Vendor Collaboration' dropdown"
+        log.error(ERROR_MESSAGE)
+        raise Exception(ERROR_MESSAGE)
+
+    # Step 5: Click 'Available Orders Report'
+    try:
+        report_link = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.LINK_TEXT, "Available Orders Report"))
+        )
+        report_link.click()
+        log.info("✅ Clicked 'Available Orders Report'")
+
+    except Exception as e:
+        ERROR_MESSAGE = f"❌ Could not click 'Available Orders Report'"
+        log.error(ERROR_MESSAGE)
+        raise Exception(ERROR_MESSAGE)
+
+    # The report page is ready once the jqGrid search box is there
+    WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "jqgid_globalSearch"))
+    )
+
@@ -0,0 +1,182 @@
+# Parser for the portal's JS alerts and plain-text replies
+# The flows used to recognise the popups with keyword checks spread over
+# placement.py and http_engine.py, and to find the order ids in them with
+# regexes built from an f-string on every call. parse_alert() does it with
+# patterns compiled once and returns what the popup says:
+#
+#   "Do you want to Commit these Order No's ?? 1. Order No : 2200478050_010-1-1"
+#       -> commit_confirm, 2200478050_010-1-1
+#   "ORDER NO:2200478050_010_1, MESSAGE: ORDER COMMIT SUCCESS"   (one line per order)
+#       -> commit_result, 2200478050_010_1 committed
+#   "Kindly refresh page once"                    -> refresh
+#   "Confirm to Allocate Vehicle For This Order"  -> allocate_confirm
+#
+# alert_corpus.jsonl holds alert texts recorded from the portal with what
+# they must parse to:
+#
+#   python portal_alerts.py --check                # parse the corpus, report mismatches
+#   python portal_alerts.py --benchmark 20000      # time parse_alert() on the corpus
+import argparse
+import json
+import os
+import re
+import time
+
+COMMIT_CONFIRM = "commit_confirm"
+COMMIT_RESULT = "commit_result"
+REFRESH = "refresh"
+ALLOCATE_CONFIRM = "allocate_confirm"
+UNKNOWN = "unknown"
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alert_corpus.jsonl")
+
+# Order id = SO number + the row suffixes, "_" or "-" separated:
+# 2200478050_010_1 in the grid and the replies, 2200478050_010-1-1 in the
+# commit confirmation
+ORDER_ID = r"(\d{10})((?:[_-]\d+)*)"
+ORDER_ID_RE = re.compile(ORDER_ID)
+CONFIRM_ORDER_RE = re.compile(r"Order No\s*:\s*" + ORDER_ID, re.I)
+RESULT_RE = re.compile(r"ORDER NO\s*:\s*" + ORDER_ID + r"\s*,\s*MESSAGE\s*:\s*ORDER COMMIT (\w+)", re.I)
+# One pass over the text decides the kind; the first keyword wins
+KIND_RE = re.compile(
+    r"(?P<commit_result>MESSAGE\s*:\s*ORDER COMMIT)"
+    r"|(?P<commit_confirm>do you want to commit|commit these order)"
+    r"|(?P<refresh>kindly refresh page once)"
+    r"|(?P<allocate_confirm>confirm to allocate vehicle)",
+    re.I)
+SUFFIX_SPLIT_RE = re.compile(r"[_-]")
+
+
+class AlertOrder:
+    def __init__(self, so_no, suffix, success=None):
+        self.so_no = so_no
+        self.suffixes = tuple(SUFFIX_SPLIT_RE.split(suffix)[1:])
+        self.order_id = so_no + suffix
+        self.success = success  # commit results only
+
+    def to_dict(self):
+        return {'order_id': self.order_id, 'so_no': self.so_no, 'suffixes': list(self.suffixes),
+                'success': self.success}
+
+    def __repr__(self):
+        return f"AlertOrder({self.order_id!r}, success={self.success})"
+
+
+class PortalAlert:
+    def __init__(self, kind, text, orders=()):
+        self.kind = kind
+        self.text = text
+        self.orders = list(orders)
+
+    @property
+    def order_ids(self):
+        return [order.order_id for order in self.orders]
+
+    @property
+    def so_numbers(self):
+        return list(dict.fromkeys(order.so_no for order in self.orders))
+
+    @property
+    def success(self):
+        # Commit results: every listed order committed. None for the other
+        # kinds, which do not report an outcome
+        if self.kind != COMMIT_RESULT:
+            return None
+        return bool(self.orders) and all(order.success for order in self.orders)
+
+    def mentions(self, so_no):
+        return str(so_no) in self.so_numbers
+
+    def orders_for(self, so_no):
+        so_no = str(so_no)
+        return [order for order in self.orders if order.so_no == so_no]
+
+    def committed(self, so_no):
+        # The first order id of so_no the portal reports as committed, or None
+        return next((order.order_id for order in self.orders_for(so_no) if order.success), None)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'success': self.success, 'orders': [o.to_dict() for o in self.orders]}
+
+    def __repr__(self):
+        return f"PortalAlert({self.kind!r}, orders={self.orders!r})"
+
+
+def parse_alert(text):
+    text = text or ""
+    match = KIND_RE.search(text)
+    kind = match.lastgroup if match else UNKNOWN
+    if kind == COMMIT_RESULT:
+        orders = [AlertOrder(so_no, suffix, status.upper() == "SUCCESS")
+                  for so_no, suffix, status in RESULT_RE.findall(text)]
+    elif kind == COMMIT_CONFIRM:
+        orders = [AlertOrder(so_no, suffix) for so_no, suffix in CONFIRM_ORDER_RE.findall(text)]
+    else:
+        orders = [AlertOrder(so_no, suffix) for so_no, suffix in ORDER_ID_RE.findall(text)]
+    return PortalAlert(kind, text, orders)
+
+
+def load_corpus(path=CORPUS_FILE):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_corpus(corpus):
+    # Returns the mismatches as (text, expected, got)
+    mismatches = []
+    for case in corpus:
+        alert = parse_alert(case["text"])
+        got = {'kind': alert.kind, 'success': alert.success,
+               'orders': [[o.order_id, o.success] for o in alert.orders]}
+        expected = {'kind': case["kind"], 'success': case.get("success"),
+                    'orders': [list(order) for order in case.get("orders", [])]}
+        if got != expected:
+            mismatches.append((case["text"], expected, got))
+    return mismatches
+
+
+def benchmark(corpus, runs):
+    texts = [case["text"] for case in corpus]
+    started = time.perf_counter()
+    for _ in range(runs):
+        for text in texts:
+            parse_alert(text)
+    elapsed = time.perf_counter() - started
+    parsed = runs * len(texts)
+    print(f"⏱️ {parsed} alerts parsed in {elapsed:.2f}s ({elapsed / parsed * 1e6:.1f} µs per alert)")
+
+    # Commit replies grow with the batch size, parsing should grow linearly
+    for size in (1, 10, 100, 1000):
+        reply = "\n".join(f"ORDER NO:{2200000000 + i}_010_1, MESSAGE: ORDER COMMIT SUCCESS" for i in range(size))
+        repeat = max(1, 10000 // size)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            alert = parse_alert(reply)
+        elapsed = (time.perf_counter() - started) / repeat
+        assert len(alert.orders) == size and alert.success
+        print(f"   commit reply with {size:>4} order(s): {elapsed * 1e6:10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portal alert parser: corpus check and micro-benchmark")
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="recorded alerts, one JSON object per line")
+    parser.add_argument("--check", action="store_true", help="parse the corpus and report mismatches")
+    parser.add_argument("--benchmark", type=int, metavar="RUNS", help="parse the whole corpus RUNS times")
+    args = parser.parse_args()
+    if not (args.check or args.benchmark):
+        parser.error("nothing to do, pass --check and/or --benchmark RUNS")
+
+    corpus = load_corpus(args.corpus)
+    if args.check:
+        mismatches = check_corpus(corpus)
+        for text, expected, got in mismatches:
+            print(f"❌ {text!r}\n   expected {expected}\n   got      {got}")
+        print(f"{'✅' if not mismatches else '❌'} {len(corpus) - len(mismatches)}/{len(corpus)} corpus alerts parsed as recorded")
+        if mismatches:
+            raise SystemExit(1)
+    if args.benchmark:
+        benchmark(corpus, args.benchmark)
+
+
+if __name__ == '__main__':
+    main()
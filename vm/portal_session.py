@@ -0,0 +1,82 @@
+# Persistent Autoplant login shared by every browser session
+# The portal cookies (JSESSIONID and friends) are saved to disk after a
+# successful login and injected into new browsers, so a full login only
+# happens when the portal bounces us back to the login form.
+import json
+import os
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+
+from log import log
+from metrics import timed
+from portal import PORTAL_URL, login, open_available_orders_report
+
+COOKIE_FILE = os.environ.get("AP_COOKIE_FILE", "portal_cookies.json")
+
+
+def is_login_page(driver):
+    return len(driver.find_elements(By.NAME, "username")) > 0
+
+
+class PortalSession:
+    def __init__(self, cookie_file=COOKIE_FILE):
+        self.cookie_file = cookie_file
+        self._lock = threading.Lock()
+
+    def load_cookies(self):
+        try:
+            with open(self.cookie_file) as f:
+                cookies = json.load(f)
+        except (OSError, ValueError):
+            return []
+        now = time.time()
+        return [c for c in cookies if not c.get("expiry") or c["expiry"] > now]
+
+    def save_cookies(self, driver):
+        cookies = driver.get_cookies()
+        with self._lock:
+            # Worker processes share the file, so each writes its own temp file
+            tmp_file = f"{self.cookie_file}.{os.getpid()}.tmp"
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(cookies, f)
+            os.replace(tmp_file, self.cookie_file)
+        log.info(f"🍪 Saved {len(cookies)} portal cookie(s)")
+
+    def _restore_cookies(self, driver):
+        # Cookies can only be set for the domain that is currently open
+        cookies = self.load_cookies()
+        if not cookies:
+            return False
+        for cookie in cookies:
+            cookie = {k: v for k, v in cookie.items()
+                      if k in ("name", "value", "path", "domain", "secure", "httpOnly", "expiry", "sameSite")}
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                log.warning(f"⚠️ Could not restore cookie {cookie.get('name')}: {e}")
+        driver.get(PORTAL_URL)
+        return True
+
+    def ensure_logged_in(self, driver):
+        driver.get(PORTAL_URL)
+        if not is_login_page(driver):
+            return
+
+        if self._restore_cookies(driver) and not is_login_page(driver):
+            log.info("🍪 Reused saved portal session")
+            return
+
+        # Saved session is missing or expired, do the full login once
+        log.info("🔐 Portal session expired, logging in again...")
+        with timed("portal_login"):
+            login(driver)
+        self.save_cookies(driver)
+
+    def open_orders_report(self, driver):
+        # Steps 1-5 for an existing browser, skipping the login when possible
+        with timed("open_orders_report"):
+            self.ensure_logged_in(driver)
+            open_available_orders_report(driver)
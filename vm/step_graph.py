@@ -0,0 +1,150 @@
+# Declarative step runner for the portal flows
+# A flow is a list of Step objects. Each step declares what it waits for,
+# what it does, how its result is checked, how long it may take in total and
+# how often it is retried, plus the steps it depends on. run_steps() walks the
+# graph: steps whose dependencies are done and that do not depend on each
+# other (e.g. the quantity while the driver autocomplete resolves) run at
+# the same time on a small thread pool.
+#
+# A failing step raises StepFailed with the message the user should see, so
+# the caller has one place to hand the browser back and build the reply.
+# The step timeout also bounds every wait_for() its action makes, so a step
+# cannot overrun it by more than one portal round trip.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as wait_futures
+
+from selenium.common.exceptions import TimeoutException
+
+from log import current_context, log, log_context
+from metrics import record_step, step_context
+from network import MEASURE_NETWORK, measure_step
+from waits import step_deadline, wait_for
+
+STEP_TIMEOUT = 30  # seconds, whole step including waits and retries
+WAIT_TIMEOUT = 10  # seconds, the usual WebDriverWait of the portal flow
+STEP_WORKERS = int(os.environ.get("AP_STEP_WORKERS", "3"))  # 1 runs every step in order
+
+
+class StepFailed(Exception):
+    def __init__(self, step, message):
+        super().__init__(message)
+        self.step = step
+
+
+class StepNotVerified(Exception):
+    # The action ran but verify() found the portal in the wrong state
+    pass
+
+
+class Step:
+    def __init__(self, name, action, wait=None, verify=None, skip=None, after=(), timeout=STEP_TIMEOUT,
+                 wait_timeout=WAIT_TIMEOUT, retries=0, error=None, optional=False):
+        self.name = name
+        self.action = action  # action(ctx, ready) -> value, ready is what wait returned
+        self.wait = wait  # wait(ctx) -> condition for WebDriverWait, None to start right away
+        self.verify = verify  # verify(ctx, value) -> bool, a False result is retried
+        self.skip = skip  # skip(ctx) -> bool, e.g. work an earlier attempt already did
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout
+        self.retries = retries
+        self.error = error  # message for the user; defaults to the exception text
+        self.optional = optional  # log failures and carry on
+
+
+def _run_step(step, ctx, context, fields):
+    # fields: the order's log context, the step may run on a pool thread
+    with log_context(**fields, step=step.name):
+        return _attempt_step(step, ctx, context)
+
+
+def _attempt_step(step, ctx, context):
+    started = time.perf_counter()
+    deadline = started + step.timeout
+    outcome = "error"
+    try:
+        if step.skip and step.skip(ctx):
+            outcome = "skipped"
+            return None
+        for attempt in range(step.retries + 1):
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    raise TimeoutException(f"Step '{step.name}' ran out of its {step.timeout}s")
+                with step_deadline(deadline):
+                    ready = None
+                    if step.wait:
+                        ready = wait_for(ctx.driver, step.wait(ctx), step.wait_timeout)
+                    value = step.action(ctx, ready)
+                if step.verify and not step.verify(ctx, value):
+                    raise StepNotVerified(f"Step '{step.name}' did not verify")
+                if time.perf_counter() > deadline:
+                    raise TimeoutException(f"Step '{step.name}' took longer than {step.timeout}s")
+                outcome = "ok"
+                return value
+            except StepFailed:
+                raise
+            except Exception as e:
+                if attempt < step.retries and time.perf_counter() < deadline:
+                    log.info(f"🔁 Step '{step.name}' failed ({e}), retrying")
+                    continue
+                if step.optional:
+                    log.warning(f"⚠️ Optional step '{step.name}' failed: {e}")
+                    outcome = "failed_optional"
+                    return None
+                if isinstance(e, TimeoutException):
+                    outcome = "timeout"  # the portal did not answer in time
+                message = step.error(ctx, e) if callable(step.error) else step.error or str(e)
+                log.error(f"❌ Step '{step.name}' failed: {e}")
+                raise StepFailed(step.name, message) from e
+    finally:
+        if outcome != "skipped":
+            record_step(step.name, time.perf_counter() - started, outcome, context)
+            if MEASURE_NETWORK:
+                measure_step(ctx.driver, step.name, context)
+
+
+def run_steps(steps, ctx, workers=STEP_WORKERS):
+    # Runs every step once its dependencies are done; returns {name: value}
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        missing = [name for name in step.after if name not in by_name]
+        if missing:
+            raise ValueError(f"Step '{step.name}' depends on unknown step(s) {missing}")
+
+    context = step_context()
+    fields = current_context()
+    if MEASURE_NETWORK:
+        # What the parked browser loaded between orders is not part of any step
+        measure_step(ctx.driver, None)
+    results = {}
+    pending = list(steps)
+    running = {}
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(name in results for name in s.after)]
+            if not ready and not running:
+                raise ValueError(f"Steps {[s.name for s in pending]} can never run, check their dependencies")
+
+            if executor is None or (len(ready) == 1 and not running):
+                # Nothing to overlap with, run it on this thread
+                for step in ready[:1]:
+                    pending.remove(step)
+                    results[step.name] = _run_step(step, ctx, context, fields)
+                continue
+
+            for step in ready:
+                pending.remove(step)
+                running[executor.submit(_run_step, step, ctx, context, fields)] = step
+            done, _ = wait_futures(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                # Re-raises StepFailed; the other running steps are waited for
+                # below so nothing keeps using the browser after we return
+                results[step.name] = future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return results
@@ -0,0 +1,190 @@
+# Pipelined placements: several orders in tabs of one logged-in browser
+# A single order leaves its Chrome idle most of the time (waiting on the
+# jqGrid, the commit alert, the autocomplete lists). With AP_TABS_PER_BROWSER
+# above 1 a worker process places that many orders at once, each in its own
+# tab of the same browser, so order B can search the grid while order A sits
+# on its commit alert.
+#
+# WebDriver only talks to one window at a time. Every tab therefore gets its
+# own driver object whose commands switch the session to that tab first,
+# under a lock shared by all tabs of the browser. JS alerts belong to the tab
+# that raised them, so an alert in tab A never blocks tab B, and A's wait for
+# its alert only ever sees A's popups.
+import copy
+import os
+import threading
+import time
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.switch_to import SwitchTo
+
+from browser_pool import CHECKOUT_TIMEOUT, SESSION_REVALIDATE_AFTER, PORTAL_SESSION, driver_healthy
+from log import log
+from network import apply_network_profile
+
+TABS_PER_BROWSER = int(os.environ.get("AP_TABS_PER_BROWSER", "1"))
+
+
+class TabFocus:
+    # The window the WebDriver session is switched to; one command at a time
+    def __init__(self, handle):
+        self.handle = handle
+        self.lock = threading.Lock()
+
+
+def tab_driver(driver, handle, focus):
+    # A copy of the driver that shares its session but runs every command in
+    # `handle`. Elements, alerts and waits created from it go through it too.
+    tab = copy.copy(driver)
+    tab._switch_to = SwitchTo(tab)
+    execute = type(driver).execute
+
+    def _execute(driver_command, params=None):
+        with focus.lock:
+            if focus.handle != handle:
+                execute(tab, Command.SWITCH_TO_WINDOW, {"handle": handle})
+                focus.handle = handle
+            return execute(tab, driver_command, params)
+
+    tab.execute = _execute
+    return tab
+
+
+class TabSession:
+    # Looks like a BrowserSession to the placement flow
+    def __init__(self, browser, handle, focus):
+        self.browser = browser
+        self.handle = handle
+        self.driver = tab_driver(browser.driver, handle, focus)
+        self.last_used = time.time()
+
+    @property
+    def debug_port(self):
+        return self.browser.debug_port
+
+    @property
+    def uses(self):
+        return self.browser.uses
+
+    def is_stale(self):
+        return time.time() - self.last_used > SESSION_REVALIDATE_AFTER
+
+
+class TabPool:
+    # Same checkout() / checkin() as BrowserPool, handing out tabs of a single
+    # browser taken from `pool`. The browser is only recycled once every tab
+    # is back, new checkouts wait for that.
+    def __init__(self, pool, tabs=TABS_PER_BROWSER):
+        self.pool = pool
+        self.tabs = tabs
+        self._browser = None
+        self._focus = None
+        self._idle = []
+        self._open = 0
+        self._busy = 0
+        self._broken = False
+        self._cond = threading.Condition()
+
+    def warm(self):
+        self.pool.warm()
+
+    def _usable(self):
+        return self._browser is not None and not self._broken and not self._browser.is_expired()
+
+    def _release_browser(self):
+        # Caller holds self._cond and no tab is in use
+        log.info(f"♻️ Recycling Chrome session on port {self._browser.debug_port} ({self._open} tab(s))")
+        self.pool.discard(self._browser)
+        self._browser = None
+        self._idle = []
+        self._open = 0
+        self._broken = False
+
+    def _open_tab(self, browser, focus):
+        with focus.lock:
+            browser.driver.switch_to.new_window("tab")
+            focus.handle = browser.driver.current_window_handle
+        tab = TabSession(browser, focus.handle, focus)
+        apply_network_profile(tab.driver)
+        PORTAL_SESSION.open_orders_report(tab.driver)
+        log.info(f"🗂️ Opened tab {self._open} of {self.tabs} on port {browser.debug_port}")
+        return tab
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                if self._browser is not None and not self._usable() and self._busy == 0:
+                    self._release_browser()
+                if self._browser is None:
+                    browser = self.pool.checkout(max(0, deadline - time.time()))
+                    self._browser = browser
+                    self._focus = TabFocus(browser.driver.current_window_handle)
+                    self._idle = [TabSession(browser, self._focus.handle, self._focus)]
+                    self._open = 1
+                if self._usable():
+                    if self._idle:
+                        tab = self._idle.pop()
+                        break
+                    if self._open < self.tabs:
+                        tab = None
+                        self._open += 1
+                        break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise Exception("❌ No browser tab available, all tabs are busy")
+                self._cond.wait(remaining)
+            browser, focus = self._browser, self._focus
+            browser.uses += 1
+            browser.last_used = time.time()
+            self._busy += 1
+
+        try:
+            if tab is None:
+                # New tabs share the browser's cookies, so only Steps 4-5 run
+                tab = self._open_tab(browser, focus)
+            elif tab.is_stale():
+                PORTAL_SESSION.open_orders_report(tab.driver)
+        except Exception:
+            with self._cond:
+                self._busy -= 1
+                if browser is self._browser:
+                    if tab is None:
+                        self._open -= 1
+                    else:
+                        self._broken = True
+                self._cond.notify_all()
+            raise
+        tab.last_used = time.time()
+        return tab
+
+    def checkin(self, tab):
+        # Reset the tab off the request thread so the response is not delayed
+        threading.Thread(target=self._recycle, args=(tab,), daemon=True).start()
+
+    def _recycle(self, tab):
+        healthy = driver_healthy(tab.driver)
+        if healthy:
+            try:
+                PORTAL_SESSION.open_orders_report(tab.driver)
+            except Exception as e:
+                log.warning(f"⚠️ Could not reset tab on port {tab.debug_port}: {e}")
+                healthy = False
+        with self._cond:
+            self._busy -= 1
+            if tab.browser is self._browser:
+                if healthy:
+                    tab.last_used = time.time()
+                    self._idle.append(tab)
+                else:
+                    # A tab that stops answering usually means the browser is gone
+                    self._broken = True
+            self._cond.notify_all()
+
+    def shutdown(self):
+        with self._cond:
+            browser, self._browser = self._browser, None
+            self._idle = []
+        if browser is not None:
+            self.pool.discard(browser)
+        self.pool.shutdown()
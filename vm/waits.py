@@ -0,0 +1,137 @@
+# Readiness conditions for the Autoplant portal pages
+# Drop-in replacements for fixed time.sleep calls: each condition is a callable
+# taking the driver, like selenium's expected_conditions, so it can be passed
+# straight to WebDriverWait(...).until(...) or combined with EC.any_of/all_of.
+# Inside step_deadline() every wait_for() is cut short at the step's deadline.
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.alert import Alert
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+POLL_FREQUENCY = 0.1  # seconds, WebDriverWait defaults to 0.5
+ROW_SETTLE_TIME = 0.3  # seconds the grid row count must stay the same
+
+GRID_ROWS = "tr.jqgrow"
+
+
+_deadline = threading.local()
+
+
+@contextmanager
+def step_deadline(deadline):
+    # deadline: a time.perf_counter() value no wait on this thread may pass
+    previous = getattr(_deadline, "at", None)
+    _deadline.at = deadline if previous is None else min(previous, deadline)
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+
+def wait_for(driver, condition, timeout=10):
+    deadline = getattr(_deadline, "at", None)
+    if deadline is not None:
+        timeout = max(0.0, min(timeout, deadline - time.perf_counter()))
+    return WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(condition)
+
+
+def ajax_idle():
+    # No jQuery requests in flight (pages without jQuery count as idle)
+    def _predicate(driver):
+        return driver.execute_script(
+            "return typeof jQuery === 'undefined' || jQuery.active === 0;")
+    return _predicate
+
+
+def jqgrid_not_loading():
+    # jqGrid shows a "Loading..." div (id load_<grid>) while it fetches rows
+    def _predicate(driver):
+        return driver.execute_script("""
+            var overlays = document.querySelectorAll("div.loading, div[id^='load_']");
+            for (var i = 0; i < overlays.length; i++) {
+                var style = window.getComputedStyle(overlays[i]);
+                if (style.display !== 'none' && style.visibility !== 'hidden') {
+                    return false;
+                }
+            }
+            return true;
+        """)
+    return _predicate
+
+
+def row_count_stable(css_selector=GRID_ROWS, settle_time=ROW_SETTLE_TIME):
+    # True once the number of matching rows has not changed for settle_time
+    state = {"count": None, "since": None}
+
+    def _predicate(driver):
+        count = driver.execute_script(
+            "return document.querySelectorAll(arguments[0]).length;", css_selector)
+        now = time.time()
+        if count != state["count"]:
+            state["count"] = count
+            state["since"] = now
+            return False
+        return now - state["since"] >= settle_time
+    return _predicate
+
+
+def jqgrid_ready():
+    # Grid finished reloading: no AJAX, no loading overlay, rows settled
+    return EC.all_of(ajax_idle(), jqgrid_not_loading(), row_count_stable())
+
+
+def first_grid_row(driver):
+    # The grid's first row before a search is sent, for wait_for_grid(); None
+    # when the grid is empty
+    try:
+        return driver.find_element(By.CSS_SELECTOR, GRID_ROWS)
+    except NoSuchElementException:
+        return None
+
+
+def grid_reloading(old_row):
+    # The search reached the grid: the rows it showed before were replaced,
+    # or the loading overlay is up
+    overlay_hidden = jqgrid_not_loading()
+
+    def _predicate(driver):
+        try:
+            old_row.is_enabled()
+        except StaleElementReferenceException:
+            return True
+        return not overlay_hidden(driver)
+    return _predicate
+
+
+def wait_for_grid(driver, locator=None, timeout=10, old_row=None):
+    # Wait for a jqGrid search to finish. When the row we are after is known,
+    # return as soon as it shows up instead of waiting for the grid to settle.
+    # old_row (first_grid_row() before the search) makes it wait for the
+    # reload first, so a matching row of the unfiltered grid, about to be
+    # replaced, is not taken for the result.
+    deadline = time.time() + timeout
+    if old_row is not None:
+        wait_for(driver, grid_reloading(old_row), timeout)
+    if locator:
+        condition = EC.any_of(EC.presence_of_element_located(locator), jqgrid_ready())
+    else:
+        condition = jqgrid_ready()
+    return wait_for(driver, condition, max(0.0, deadline - time.time()))
+
+
+def wait_for_alert_or(driver, locator, timeout=10):
+    # Optional popups: returns the alert if one opens, or None as soon as the
+    # element that follows it is usable (or the timeout passes)
+    try:
+        found = wait_for(driver, EC.any_of(
+            EC.alert_is_present(),
+            EC.element_to_be_clickable(locator),
+        ), timeout)
+    except TimeoutException:
+        return None
+    return found if isinstance(found, Alert) else None
@@ -0,0 +1,228 @@
+# Leak watchdog for Chrome and chromedriver
+# A quit that hangs or fails, or a worker process that dies mid-order, leaves
+# chrome / chromedriver processes and chrome_selenium_* profile directories
+# behind, and the VM slowly runs out of memory. Three layers keep it flat:
+#
+#   BrowserSession.close() quits with a timeout and then kills whatever is
+#   left of the browser's process tree (kill_tree)
+#   BrowserSession.is_expired() retires a browser whose tree grew past
+#   BROWSER_MAX_RSS_MB, so the pool recycles it at the next checkout/checkin
+#   BrowserWatchdog, a thread in the service process, kills orphaned browser
+#   trees and removes profile directories no browser uses any more
+#
+# Process handling needs psutil; without it only the profile sweep runs.
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from chrome_profile import PROFILE_PREFIX, PROFILE_ROOT
+from log import log
+
+WATCHDOG_INTERVAL = float(os.environ.get("AP_WATCHDOG_INTERVAL", "60"))  # seconds
+ORPHAN_GRACE = float(os.environ.get("AP_ORPHAN_GRACE", "120"))  # seconds a leaked process or dir may live
+PROFILE_STALE_AFTER = float(os.environ.get("AP_PROFILE_STALE_AFTER", str(6 * 60 * 60)))  # without psutil
+BROWSER_MAX_RSS_MB = float(os.environ.get("AP_BROWSER_MAX_RSS_MB", "1536"))  # whole tree, 0 disables
+QUIT_TIMEOUT = 15  # seconds driver.quit() may take before the tree is killed
+KILL_TIMEOUT = 5  # seconds between SIGTERM and SIGKILL
+
+BROWSER_PROCESSES = ("chrome", "chromium", "chromedriver")
+
+
+def _is_browser(name):
+    name = (name or "").lower()
+    return any(p in name for p in BROWSER_PROCESSES)
+
+
+def process_tree(pid):
+    # The process and all its descendants, [] when it is gone or without psutil
+    if psutil is None or not pid:
+        return []
+    try:
+        root = psutil.Process(pid)
+        return [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def tree_rss_mb(pid):
+    rss = 0
+    for proc in process_tree(pid):
+        try:
+            rss += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss / 2 ** 20
+
+
+def kill_tree(procs, label):
+    # SIGTERM, then SIGKILL for whatever is still running; returns the count
+    alive = []
+    for proc in procs:
+        try:
+            if proc.is_running():
+                proc.terminate()
+                alive.append(proc)
+        except psutil.Error:
+            pass
+    if not alive:
+        return 0
+    _, survivors = psutil.wait_procs(alive, timeout=KILL_TIMEOUT)
+    for proc in survivors:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    log.info(f"🔪 Killed {len(alive)} leftover process(es) of {label}")
+    return len(alive)
+
+
+def quit_driver(driver, label, pid=None):
+    # driver.quit() can hang on a wedged browser; kill the tree either way
+    procs = process_tree(pid)  # before quitting, Chrome is still a child
+    quitter = threading.Thread(target=_quit, args=(driver, label), daemon=True)
+    quitter.start()
+    quitter.join(QUIT_TIMEOUT)
+    if quitter.is_alive():
+        log.warning(f"⚠️ Quitting {label} took longer than {QUIT_TIMEOUT}s")
+    if procs:
+        kill_tree(procs, label)
+
+
+def _quit(driver, label):
+    try:
+        driver.quit()
+    except Exception as e:
+        log.warning(f"⚠️ Could not quit {label}: {e}")
+
+
+def driver_pid(driver):
+    # chromedriver's pid; Chrome runs below it
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def profile_in_use(path):
+    # Chrome keeps SingletonLock -> "<host>-<pid>" while it has the profile open
+    try:
+        pid = int(os.readlink(os.path.join(path, "SingletonLock")).rsplit("-", 1)[-1])
+    except (OSError, ValueError):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class BrowserWatchdog:
+    def __init__(self, interval=WATCHDOG_INTERVAL, grace=ORPHAN_GRACE):
+        self.interval = interval
+        self.grace = grace
+        self.orphans_killed = 0
+        self.profiles_removed = 0
+        self.browser_processes = 0
+        self.browser_rss_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if psutil is None:
+            log.warning("⚠️ psutil is not installed, the watchdog only sweeps profile directories")
+        self._thread = threading.Thread(target=self._run, name="browser-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                log.warning(f"⚠️ Browser watchdog check failed: {e}")
+
+    def check(self):
+        in_use = set()
+        if psutil is not None:
+            in_use = self._check_processes()
+        self._sweep_profiles(in_use)
+
+    def _check_processes(self):
+        # Returns the profile dirs live browsers have open
+        me = os.getpid()
+        now = time.time()
+        browsers = {}
+        for proc in psutil.process_iter(["pid", "ppid", "name", "cmdline", "create_time", "memory_info"]):
+            if _is_browser(proc.info["name"]):
+                browsers[proc.pid] = proc
+
+        in_use = set()
+        ours = set()  # browsers running on one of our chrome_selenium_* profiles
+        rss = 0
+        for proc in browsers.values():
+            cmdline = proc.info["cmdline"] or []
+            profile = next((arg.split("=", 1)[1] for arg in cmdline if arg.startswith("--user-data-dir=")), None)
+            if profile:
+                in_use.add(os.path.realpath(profile))
+                if os.path.basename(profile.rstrip(os.sep)).startswith(PROFILE_PREFIX):
+                    ours.add(proc.pid)
+            if proc.info["memory_info"]:
+                rss += proc.info["memory_info"].rss
+
+        for proc in browsers.values():
+            # Only the top of each browser tree decides whether it leaked
+            if proc.info["ppid"] in browsers:
+                continue
+            # Other chromedrivers on the host are not ours to kill: a tree is
+            # only ours when a Chrome in it uses one of our profiles
+            tree = process_tree(proc.pid)
+            if not any(p.pid in ours for p in tree):
+                continue
+            # A worker's browsers hang below the worker; once it is gone they
+            # are re-parented to init (or to us when we are the subreaper)
+            parentless = proc.info["ppid"] in (0, 1, me) or not psutil.pid_exists(proc.info["ppid"])
+            if parentless and now - (proc.info["create_time"] or now) > self.grace:
+                self.orphans_killed += kill_tree(tree, f"orphaned {proc.info['name']} {proc.pid}")
+
+        self.browser_processes = len(browsers)
+        self.browser_rss_mb = rss / 2 ** 20
+        return in_use
+
+    def _sweep_profiles(self, in_use):
+        stale_after = self.grace if psutil is not None else PROFILE_STALE_AFTER
+        now = time.time()
+        for root in {PROFILE_ROOT, tempfile.gettempdir()}:
+            for path in glob.glob(os.path.join(root, PROFILE_PREFIX + "*")):
+                try:
+                    age = now - os.path.getmtime(path)
+                except OSError:
+                    continue
+                if age < stale_after or os.path.realpath(path) in in_use or profile_in_use(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                self.profiles_removed += 1
+                log.info(f"🧹 Removed stale Chrome profile {path}")
+
+    def gauges(self):
+        return {
+            'ap_browser_processes': ('Chrome and chromedriver processes on the host', self.browser_processes),
+            'ap_browser_rss_bytes': ('Memory used by all Chrome and chromedriver processes',
+                                     int(self.browser_rss_mb * 2 ** 20)),
+            'ap_browser_orphans_killed': ('Leaked browser processes killed since start', self.orphans_killed),
+            'ap_browser_profiles_removed': ('Stale Chrome profile directories removed since start',
+                                            self.profiles_removed),
+        }
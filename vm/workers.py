@@ -0,0 +1,168 @@
+# Worker processes that place orders in parallel
+# Every worker is a separate Python process owning exactly one pooled Chrome
+# session, with its own remote debugging port and profile directory, so
+# several SO numbers can go through the portal at the same time. With
+# AP_TABS_PER_BROWSER above 1 each worker also takes that many orders at once,
+# one per tab of its browser (see tabs.py), over one pipe per tab.
+import multiprocessing
+import os
+import queue
+import threading
+
+from browser_pool import BrowserPool, DEBUG_PORT_BASE
+from concurrency import AdaptiveLimiter
+from log import drain_dropped_records, log, log_context, merge_dropped_records
+from metrics import REGISTRY
+from tabs import TabPool, TABS_PER_BROWSER
+from watchdog import BrowserWatchdog
+
+WORKERS = int(os.environ.get("AP_WORKERS", "2"))
+SHUTDOWN_TIMEOUT = 15  # seconds
+
+# Workers are spawned rather than forked, the Flask server already runs threads
+_mp = multiprocessing.get_context("spawn")
+
+
+def _serve(conn, pool):
+    from placement import place_order, place_batch
+
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            data, job_id = message
+            try:
+                with log_context(job_id=job_id):
+                    if 'orders' in data:
+                        result = place_batch(data['orders'], pool, job_id)
+                    else:
+                        result = place_order(data, pool, job_id)
+            except Exception as e:
+                log.exception(f"❌ Job {job_id} raised in the worker: {e}")
+                result = {'status': 'error', 'message': str(e), 'processed_data': None}
+            conn.send((result, REGISTRY.drain(), drain_dropped_records()))
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+def _worker_main(index, conns):
+    # Timings go back to the parent process with every result
+    REGISTRY.forward = True
+    pool = BrowserPool(size=1, debug_port_base=DEBUG_PORT_BASE + index)
+    if len(conns) > 1:
+        pool = TabPool(pool, tabs=len(conns))
+    pool.warm()
+    log.info(f"👷 Worker {index} started (pid {os.getpid()}, debugging port {DEBUG_PORT_BASE + index}, "
+          f"{len(conns)} tab(s))")
+    # One thread per tab, each placing one order at a time
+    threads = [threading.Thread(target=_serve, args=(conn, pool), name=f"tab-{i}", daemon=True)
+               for i, conn in enumerate(conns)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
+
+
+class BrowserWorker:
+    def __init__(self, index, tabs=TABS_PER_BROWSER):
+        self.index = index
+        self.tabs = tabs
+        self.conns = []
+        self.process = None
+        self._restart_lock = threading.Lock()
+
+    def start(self):
+        pipes = [_mp.Pipe() for _ in range(self.tabs)]
+        self.conns = [conn for conn, _ in pipes]
+        child_conns = [child_conn for _, child_conn in pipes]
+        self.process = _mp.Process(target=_worker_main, args=(self.index, child_conns),
+                                   name=f"browser-worker-{self.index}", daemon=True)
+        self.process.start()
+        for child_conn in child_conns:
+            child_conn.close()
+
+    def run(self, data, job_id=None, tab=0):
+        conn = self.conns[tab]
+        conn.send((data, job_id))
+        return conn.recv()
+
+    def restart(self, process):
+        # Every tab of a dead worker notices; only the first one restarts it
+        with self._restart_lock:
+            if self.process is process:
+                self.stop()
+                self.start()
+
+    def stop(self):
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except Exception:
+                pass
+        self.process.join(SHUTDOWN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+class WorkerPool:
+    def __init__(self, processes=WORKERS, tabs=TABS_PER_BROWSER):
+        self.processes = processes
+        self.tabs = tabs
+        self.slots = processes * tabs  # orders that can be in flight at once
+        self._workers = [BrowserWorker(i, tabs) for i in range(processes)]
+        # Cleans up after browsers whose worker died or whose quit failed
+        self.watchdog = BrowserWatchdog()
+        # How many of the slots may be busy, from how well the portal keeps up
+        self.limiter = AdaptiveLimiter(self.slots)
+        self._idle = queue.Queue()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for worker in self._workers:
+            worker.start()
+        self.watchdog.start()
+        # Tabs are handed out round robin, so orders spread over the browsers
+        for tab in range(self.tabs):
+            for worker in self._workers:
+                self._idle.put((worker, tab))
+
+    def run(self, data, job_id=None, retry=True):
+        # Blocks until a worker tab is free, then until the order is placed.
+        # The job queue only hands over as many orders as the limiter allows.
+        worker, tab = self._idle.get()
+        process = worker.process
+        try:
+            result, observations, dropped = worker.run(data, job_id, tab)
+            REGISTRY.merge(observations)
+            merge_dropped_records(dropped)
+            self.limiter.observe(observations)
+            return result
+        except (EOFError, OSError) as e:
+            # The worker process died mid-order, replace it
+            log.error(f"❌ Worker {worker.index} died while placing SO {data.get('so_no') or 'batch'}: {e}")
+            worker.restart(process)
+            if not retry:
+                return {'status': 'error', 'message': f"❌ Browser worker crashed: {e}", 'processed_data': None}
+        finally:
+            self._idle.put((worker, tab))
+        # Once more on a fresh worker, resuming from the order's checkpoint
+        return self.run(data, job_id, retry=False)
+
+    def shutdown(self):
+        if not self._started:
+            return
+        self.watchdog.stop()
+        for worker in self._workers:
+            worker.stop()